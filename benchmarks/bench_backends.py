@@ -0,0 +1,106 @@
+import sys
+import time
+from pathlib import Path
+from zipfile import ZipFile
+
+cwd = Path(__file__).parent.parent
+
+sys.path.append(str(cwd))
+
+from cfdi import xml_backend
+from cfdi.cfdi import FacturaFiscal
+from comprobante_fiscal_sat import ComprobanteFiscal
+
+# Compara los backends XML (lxml y ElementTree) sobre los mismos XML: primero
+# verifica que FacturaFiscal y ComprobanteFiscal salgan iguales con ambos y
+# luego mide cada uno. Sin ZIP se usa un corpus sintético.
+# Uso: python benchmarks/bench_backends.py [archivo.zip] [repeticiones]
+
+if len(sys.argv) == 1 or not sys.argv[1].lower().endswith(".zip"):
+    import atexit
+    import shutil
+    import tempfile
+    from benchmarks.corpus import generar_zip
+
+    directorio = tempfile.mkdtemp(prefix="cfdi_bench_")
+    atexit.register(shutil.rmtree, directorio, True)
+    path = generar_zip(Path(directorio) / "corpus.zip", documentos=300, conceptos=20)
+else:
+    path = Path(sys.argv[1])
+
+repeticiones = int(sys.argv[-1]) if sys.argv[-1].isdigit() else 3
+
+if not path.exists():
+    raise ValueError('No es una ruta valida {}'.format(str(path)))
+
+if xml_backend.usar_backend("lxml") != "lxml":
+    print("lxml no está instalado; sólo se puede medir etree")
+    sys.exit(0)
+
+with ZipFile(path, "r") as zip_file:
+    documentos = [
+        zip_file.read(name)
+        for name in zip_file.namelist()
+        if name.lower().endswith(".xml")
+    ]
+
+
+def convertir_todos(backend: str) -> tuple:
+    xml_backend.usar_backend(backend)
+    facturas = [FacturaFiscal.parse_from_xml(xml) for xml in documentos]
+    comprobantes = [
+        ComprobanteFiscal.convertirxml(xml=xml.decode("utf-8")) for xml in documentos
+    ]
+    return facturas, [c.asdict() if c is not None else None for c in comprobantes]
+
+
+def medir(backend: str, funcion, entradas: list) -> float:
+    xml_backend.usar_backend(backend)
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for xml in entradas:
+            funcion(xml)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor
+
+
+# Ambos backends deben producir los mismos objetos
+facturas_etree, comprobantes_etree = convertir_todos("etree")
+facturas_lxml, comprobantes_lxml = convertir_todos("lxml")
+
+for a, b in zip(facturas_etree, facturas_lxml):
+    if a is None or b is None:
+        assert a is b
+        continue
+    assert a.uuid == b.uuid and a.total == b.total, a.uuid
+    assert a.emisor == b.emisor and a.receptor == b.receptor, a.uuid
+    assert a.conceptos == b.conceptos, a.uuid
+    assert a.impuestos == b.impuestos, a.uuid
+    assert a.pagos == b.pagos, a.uuid
+
+assert comprobantes_etree == comprobantes_lxml
+
+textos = [xml.decode("utf-8") for xml in documentos]
+
+resultados = {}
+for backend in ("etree", "lxml"):
+    resultados[backend] = (
+        medir(backend, FacturaFiscal.parse_from_xml, documentos),
+        medir(backend, lambda xml: ComprobanteFiscal.convertirxml(xml=xml), textos),
+    )
+
+print("Documentos: {}".format(len(documentos)))
+for backend, (facturas, comprobantes) in resultados.items():
+    print(
+        "{:<6} parse_from_xml {:.3f} s   convertirxml {:.3f} s".format(
+            backend, facturas, comprobantes
+        )
+    )
+print(
+    "Aceleración lxml: parse_from_xml {:.2f}x   convertirxml {:.2f}x".format(
+        resultados["etree"][0] / resultados["lxml"][0],
+        resultados["etree"][1] / resultados["lxml"][1],
+    )
+)
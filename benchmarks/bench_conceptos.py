@@ -0,0 +1,58 @@
+import sys
+import time
+from pathlib import Path
+
+cwd = Path(__file__).parent.parent
+
+sys.path.append(str(cwd))
+
+from benchmarks.corpus import GeneradorCorpus
+from comprobante_fiscal_sat import ComprobanteIngreso
+
+# Escalamiento de ComprobanteIngreso.convertir_xml con el número de
+# conceptos: el costo por concepto debe mantenerse constante (lineal en el
+# total). Verifica además que cada concepto traiga sólo sus propios
+# impuestos. Termina con error si el costo por concepto del documento más
+# grande pasa de TOLERANCIA veces el del más chico.
+# Uso: python benchmarks/bench_conceptos.py [conceptos ...]
+
+TOLERANCIA = 2.0
+
+tamanos = [int(n) for n in sys.argv[1:]] or [100, 1000, 5000, 20000]
+generador = GeneradorCorpus()
+
+resultados = []
+for conceptos in tamanos:
+    xml = generador.ingreso(conceptos=conceptos)
+
+    ingreso = ComprobanteIngreso.convertir_xml(xml=xml)
+    assert len(ingreso.conceptos) == conceptos
+    # El corpus pone un traslado y una retención en cada concepto
+    for concepto in ingreso.conceptos:
+        assert [i.tipo for i in concepto.Impuestos] == ["Traslado", "Retencion"]
+        assert concepto.Impuestos[0].Base == concepto.Importe
+    assert [i.tipo for i in ingreso.comprobante.impuestos] == ["Traslado", "Retencion"]
+
+    repeticiones = max(1, 20000 // conceptos)
+    mejor = None
+    for _ in range(3):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            ComprobanteIngreso.convertir_xml(xml=xml)
+        duracion = (time.perf_counter() - inicio) / repeticiones
+        mejor = duracion if mejor is None else min(mejor, duracion)
+
+    resultados.append((conceptos, mejor))
+    print(
+        "{:>7} conceptos  {:>9.2f} ms  {:>6.2f} µs/concepto".format(
+            conceptos, mejor * 1e3, mejor / conceptos * 1e6
+        )
+    )
+
+por_concepto = [segundos / conceptos for conceptos, segundos in resultados]
+crecimiento = por_concepto[-1] / por_concepto[0]
+print("Costo por concepto, más grande / más chico: {:.2f}x".format(crecimiento))
+
+if crecimiento > TOLERANCIA:
+    print("El costo no es lineal en el número de conceptos")
+    sys.exit(1)
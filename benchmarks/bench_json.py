@@ -0,0 +1,84 @@
+import json
+import sys
+import time
+from pathlib import Path
+from zipfile import ZipFile
+
+cwd = Path(__file__).parent.parent
+
+sys.path.append(str(cwd))
+
+from comprobante_fiscal_sat import ComprobanteFiscal, serializar, serializar_json
+
+# Compara json.dumps(asdict()) contra serializar_json sobre comprobantes de
+# pago con muchos DoctoRelacionado (y algunos ingresos). Verifica que ambos
+# den el mismo JSON y mide con orjson (si está instalado) y sin él.
+# Uso: python benchmarks/bench_json.py [doctos_por_pago] [repeticiones]
+
+import atexit
+import shutil
+import tempfile
+from benchmarks.corpus import generar_zip
+
+doctos = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+directorio = tempfile.mkdtemp(prefix="cfdi_bench_")
+atexit.register(shutil.rmtree, directorio, True)
+path = generar_zip(
+    Path(directorio) / "corpus.zip",
+    documentos=20,
+    conceptos=20,
+    doctos_relacionados=doctos,
+    proporcion_pagos=0.5,
+)
+
+with ZipFile(path, "r") as zip_file:
+    textos = [
+        zip_file.read(n).decode("utf-8")
+        for n in zip_file.namelist()
+        if n.lower().endswith(".xml")
+    ]
+
+comprobantes = [ComprobanteFiscal.convertirxml(xml=xml) for xml in textos]
+comprobantes = [c for c in comprobantes if c is not None]
+
+
+def con_asdict() -> list:
+    return [json.dumps(c.asdict(), ensure_ascii=False).encode("utf-8") for c in comprobantes]
+
+
+def directo() -> list:
+    return [serializar_json(c) for c in comprobantes]
+
+
+def medir(funcion) -> float:
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor
+
+
+referencia = [json.loads(j) for j in con_asdict()]
+assert [json.loads(j) for j in directo()] == referencia
+
+base = medir(con_asdict)
+print("Comprobantes: {}  DoctoRelacionado por pago: {}".format(len(comprobantes), doctos))
+print("{:<24} {:.3f} s".format("asdict + json.dumps", base))
+
+resultados = []
+if serializar.orjson is not None:
+    resultados.append(("serializar_json orjson", medir(directo)))
+
+orjson, serializar.orjson = serializar.orjson, None
+try:
+    assert [json.loads(j) for j in directo()] == referencia
+    resultados.append(("serializar_json json", medir(directo)))
+finally:
+    serializar.orjson = orjson
+
+for nombre, segundos in resultados:
+    print("{:<24} {:.3f} s  {:.2f}x".format(nombre, segundos, base / segundos))
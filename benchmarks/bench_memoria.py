@@ -0,0 +1,51 @@
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+cwd = Path(__file__).parent.parent
+
+sys.path.append(str(cwd))
+
+from cfdi import tools
+
+# Reporta los bytes por factura que quedan en memoria después de cargar un
+# ZIP (o un corpus sintético de benchmarks.corpus si no se indica), en modo
+# normal y en modo compacto (FacturaFiscal.compactar).
+# Uso: python benchmarks/bench_memoria.py [archivo.zip]
+
+if len(sys.argv) == 1 or not sys.argv[1].lower().endswith(".zip"):
+    # Sin ZIP se usa un corpus sintético
+    import atexit
+    import shutil
+    import tempfile
+    from benchmarks.corpus import generar_zip
+
+    directorio = tempfile.mkdtemp(prefix="cfdi_bench_")
+    atexit.register(shutil.rmtree, directorio, True)
+    path = generar_zip(Path(directorio) / "corpus.zip", documentos=200, conceptos=50)
+else:
+    path = Path(sys.argv[1])
+
+
+if not path.exists():
+    raise ValueError('No es una ruta valida {}'.format(str(path)))
+
+
+def medir(compacto: bool) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    facturas = tools.convertir_facturas_zip(path, compacto=compacto)
+    gc.collect()
+    actual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(facturas), actual, pico
+
+
+for nombre, compacto in (("Normal", False), ("Compacto", True)):
+    total, actual, pico = medir(compacto)
+    print(
+        "{:<9} facturas: {}  bytes/factura: {:,.0f}  pico: {:,.0f} bytes".format(
+            nombre, total, actual / max(total, 1), pico
+        )
+    )
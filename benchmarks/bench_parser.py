@@ -0,0 +1,104 @@
+import sys
+import time
+from pathlib import Path
+from zipfile import ZipFile
+
+cwd = Path(__file__).parent.parent
+
+sys.path.append(str(cwd))
+
+from cfdi.cfdi import FacturaFiscal
+
+# Compara el parser de árbol (ET.fromstring) contra el parser de una
+# sola pasada sobre los XML de un ZIP descargado del SAT (o un corpus
+# sintético de benchmarks.corpus si no se indica el ZIP). El parser de una
+# sola pasada no es más rápido; lo que ahorra es memoria, que se mide con
+# tracemalloc sobre un documento de muchos conceptos (con el backend etree,
+# porque tracemalloc no ve la memoria que reserva lxml).
+# Uso: python benchmarks/bench_parser.py [archivo.zip] [repeticiones]
+
+if len(sys.argv) == 1 or not sys.argv[1].lower().endswith(".zip"):
+    # Sin ZIP se usa un corpus sintético
+    import atexit
+    import shutil
+    import tempfile
+    from benchmarks.corpus import generar_zip
+
+    directorio = tempfile.mkdtemp(prefix="cfdi_bench_")
+    atexit.register(shutil.rmtree, directorio, True)
+    path = generar_zip(Path(directorio) / "corpus.zip", documentos=200, conceptos=50)
+else:
+    path = Path(sys.argv[1])
+
+repeticiones = int(sys.argv[-1]) if sys.argv[-1].isdigit() else 3
+
+if not path.exists():
+    raise ValueError('No es una ruta valida {}'.format(str(path)))
+
+with ZipFile(path, "r") as zip_file:
+    documentos = [
+        zip_file.read(name)
+        for name in zip_file.namelist()
+        if name.lower().endswith(".xml")
+    ]
+
+
+def medir(streaming: bool) -> float:
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for xml in documentos:
+            FacturaFiscal.parse_from_xml(xml, streaming=streaming)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor
+
+
+# Ambos parsers deben producir la misma factura
+for xml in documentos:
+    a = FacturaFiscal.parse_from_xml(xml)
+    b = FacturaFiscal.parse_from_xml(xml, streaming=True)
+    if a is None or b is None:
+        continue
+    assert a.uuid == b.uuid and a.total == b.total, a.uuid
+    assert a.conceptos == b.conceptos, a.uuid
+    assert a.impuestos == b.impuestos, a.uuid
+
+actual = medir(streaming=False)
+streaming = medir(streaming=True)
+
+print("Documentos: {}".format(len(documentos)))
+print("Parser árbol:     {:.3f} s".format(actual))
+print("Parser streaming: {:.3f} s".format(streaming))
+print("Tiempo streaming / árbol: {:.2f}x".format(streaming / actual))
+
+
+import tracemalloc
+from benchmarks.corpus import GeneradorCorpus
+from cfdi import xml_backend
+
+
+def memoria_pico(xml: bytes, streaming: bool) -> int:
+    tracemalloc.start()
+    factura = FacturaFiscal.parse_from_xml(xml, streaming=streaming, compacto=True)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del factura
+    return pico
+
+
+grande = GeneradorCorpus().ingreso(conceptos=20000)
+if isinstance(grande, str):
+    grande = grande.encode("utf-8")
+
+anterior = xml_backend.backend()
+xml_backend.usar_backend("etree")
+try:
+    arbol = memoria_pico(grande, streaming=False)
+    pasada = memoria_pico(grande, streaming=True)
+finally:
+    xml_backend.usar_backend(anterior)
+
+print("Memoria pico, 20000 conceptos (etree):")
+print("Parser árbol:     {:.1f} MB".format(arbol / 1e6))
+print("Parser streaming: {:.1f} MB".format(pasada / 1e6))
@@ -0,0 +1,134 @@
+import sys
+import timeit
+from pathlib import Path
+
+cwd = Path(__file__).parent.parent
+
+sys.path.append(str(cwd))
+
+from comprobante_fiscal_sat.models import (
+    Comprobante,
+    Concepto,
+    Impuesto,
+    DocumentoRelacionado,
+)
+
+# Costo por objeto de Common.set_from_dict (convertidores precalculados por
+# clase) contra el recorrido genérico anterior, que revisaba cada atributo
+# de la instancia con una cadena de isinstance. Primero verifica que ambos
+# dejen el objeto igual.
+# Uso: python benchmarks/bench_set_from_dict.py [repeticiones]
+
+
+def set_from_dict_generico(self, kwargs: dict = {}):
+    # Implementación anterior, sólo como referencia
+    for key in self.__dict__.keys():
+        if key in kwargs:
+            value = kwargs[key]
+            attr = getattr(self, key)
+            if isinstance(attr, str):
+                setattr(self, key, str(value))
+            elif isinstance(attr, int):
+                try:
+                    setattr(self, key, int(value))
+                except (ValueError, TypeError):
+                    setattr(self, key, 0)
+            elif isinstance(attr, float):
+                try:
+                    setattr(self, key, float(value))
+                except (ValueError, TypeError):
+                    setattr(self, key, 0.0)
+            elif isinstance(attr, dict):
+                if isinstance(value, dict):
+                    setattr(self, key, value)
+            elif isinstance(attr, list):
+                if isinstance(value, list):
+                    setattr(self, key, value)
+            else:
+                setattr(self, key, value)
+
+
+# Atributos como los trae el XML (incluye algunos que no son campos)
+CASOS = {
+    Comprobante: {
+        "Version": "4.0",
+        "Serie": "A",
+        "Folio": "1234",
+        "Fecha": "2024-05-01T10:00:00",
+        "Sello": "x" * 344,
+        "FormaPago": "03",
+        "NoCertificado": "00001000000500000000",
+        "Certificado": "y" * 1500,
+        "Moneda": "MXN",
+        "TipoCambio": "1",
+        "SubTotal": "1000.00",
+        "Total": "1160.00",
+        "TipoDeComprobante": "I",
+        "Exportacion": "01",
+        "MetodoPago": "PUE",
+        "LugarExpedicion": "64000",
+        "{http://www.w3.org/2001/XMLSchema-instance}schemaLocation": "...",
+    },
+    Concepto: {
+        "ClaveProdServ": "01010101",
+        "NoIdentificacion": "SKU-1",
+        "Cantidad": "2",
+        "ClaveUnidad": "H87",
+        "Descripcion": "Producto de prueba",
+        "ValorUnitario": "500.00",
+        "Importe": "1000.00",
+        "ObjetoImp": "02",
+    },
+    Impuesto: {
+        "Base": "1000.00",
+        "Impuesto": "002",
+        "TipoFactor": "Tasa",
+        "TasaOCuota": "0.160000",
+        "Importe": "160.00",
+    },
+    DocumentoRelacionado: {
+        "IdDocumento": "9F1C0D2E-0000-4000-8000-000000000001",
+        "Serie": "A",
+        "Folio": "99",
+        "MonedaDR": "MXN",
+        "EquivalenciaDR": "1",
+        "NumParcialidad": "1",
+        "ImpSaldoAnt": "1160.00",
+        "ImpPagado": "1160.00",
+        "ImpSaldoInsoluto": "0.00",
+        "ObjetoImpDR": "02",
+    },
+}
+
+repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+for clase, atributos in CASOS.items():
+    nuevo = clase()
+    nuevo.set_from_dict(atributos)
+    anterior = clase()
+    set_from_dict_generico(anterior, atributos)
+    assert nuevo == anterior and nuevo.asdict() == anterior.asdict(), clase.__name__
+
+print("{:<22} {:>12} {:>12} {:>8}".format("clase", "genérico µs", "tabla µs", "x"))
+for clase, atributos in CASOS.items():
+    generico = min(
+        timeit.repeat(
+            lambda: set_from_dict_generico(clase(), atributos),
+            number=repeticiones,
+            repeat=3,
+        )
+    )
+    tabla = min(
+        timeit.repeat(
+            lambda: clase().set_from_dict(atributos), number=repeticiones, repeat=3
+        )
+    )
+    # Se descuenta la construcción del objeto para dejar sólo la hidratación
+    construir = min(timeit.repeat(clase, number=repeticiones, repeat=3))
+    generico = (generico - construir) / repeticiones * 1e6
+    tabla = (tabla - construir) / repeticiones * 1e6
+    print(
+        "{:<22} {:>12.2f} {:>12.2f} {:>8.2f}".format(
+            clase.__name__, generico, tabla, generico / tabla
+        )
+    )
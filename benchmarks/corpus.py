@@ -0,0 +1,249 @@
+import random
+import uuid as uuidlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Union
+from zipfile import ZipFile, ZIP_DEFLATED
+
+# Generador de CFDI 4.0 sintéticos (ingresos y complementos de pago 2.0)
+# para los benchmarks. Los importes cuadran entre conceptos, impuestos y
+# totales; el sello y el certificado son texto de relleno del mismo tamaño
+# aproximado que los reales.
+
+NAMESPACES = (
+    'xmlns:cfdi="http://www.sat.gob.mx/cfd/4" '
+    'xmlns:pago20="http://www.sat.gob.mx/Pagos20" '
+    'xmlns:tfd="http://www.sat.gob.mx/TimbreFiscalDigital" '
+    'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"'
+)
+
+SELLO = "A" * 344
+CERTIFICADO = "M" * 1800
+
+CLAVES_PRODUCTO = ["84111506", "81112100", "43211500", "78101800", "80101500"]
+CLAVES_UNIDAD = ["E48", "H87", "ACT", "KGM"]
+
+
+class GeneradorCorpus:
+    def __init__(self, semilla: int = 2024, emisores: int = 20, receptores: int = 50):
+        self.random = random.Random(semilla)
+        self.emisores = [self._rfc("E", i) for i in range(emisores)]
+        self.receptores = [self._rfc("R", i) for i in range(receptores)]
+        self.fecha_inicio = datetime(2024, 1, 1)
+
+    @staticmethod
+    def _rfc(prefijo: str, n: int) -> str:
+        return "{}{:02d}{:06d}AB{}".format(prefijo * 2, n % 100, 10101 + n, n % 10)
+
+    def _uuid(self) -> str:
+        return str(uuidlib.UUID(int=self.random.getrandbits(128))).upper()
+
+    def _fecha(self) -> str:
+        segundos = self.random.randrange(365 * 24 * 3600)
+        return (self.fecha_inicio + timedelta(seconds=segundos)).isoformat()
+
+    def _timbre(self, fecha: str) -> str:
+        return (
+            '<tfd:TimbreFiscalDigital Version="1.1" UUID="{}" FechaTimbrado="{}" '
+            'RfcProvCertif="SAT970701NN3" SelloCFD="{}" '
+            'NoCertificadoSAT="00001000000505142236" SelloSAT="{}"/>'
+        ).format(self._uuid(), fecha, SELLO, SELLO)
+
+    def _partes(self, tipo: str, fecha: str) -> tuple:
+        rfc_emisor = self.random.choice(self.emisores)
+        rfc_receptor = self.random.choice(self.receptores)
+        emisor = '<cfdi:Emisor Rfc="{}" Nombre="EMISOR {}" RegimenFiscal="601"/>'.format(
+            rfc_emisor, rfc_emisor[:4]
+        )
+        receptor = (
+            '<cfdi:Receptor Rfc="{}" Nombre="RECEPTOR {}" '
+            'DomicilioFiscalReceptor="64000" RegimenFiscalReceptor="601" '
+            'UsoCFDI="{}"/>'
+        ).format(rfc_receptor, rfc_receptor[:4], "CP01" if tipo == "P" else "G03")
+        return emisor, receptor
+
+    def ingreso(self, conceptos: int = 10) -> str:
+        fecha = self._fecha()
+        emisor, receptor = self._partes("I", fecha)
+
+        nodos = []
+        subtotal = 0.0
+        traslados = 0.0
+        retenciones = 0.0
+
+        for _ in range(conceptos):
+            cantidad = self.random.randint(1, 10)
+            valor_unitario = round(self.random.uniform(10, 5000), 2)
+            importe = round(cantidad * valor_unitario, 2)
+            iva = round(importe * 0.16, 2)
+            isr = round(importe * 0.10, 2)
+            subtotal += importe
+            traslados += iva
+            retenciones += isr
+
+            nodos.append(
+                '<cfdi:Concepto ClaveProdServ="{}" Cantidad="{}" ClaveUnidad="{}" '
+                'Descripcion="Servicio profesional {}" ValorUnitario="{:.2f}" '
+                'Importe="{:.2f}" ObjetoImp="02"><cfdi:Impuestos><cfdi:Traslados>'
+                '<cfdi:Traslado Base="{:.2f}" Impuesto="002" TipoFactor="Tasa" '
+                'TasaOCuota="0.160000" Importe="{:.2f}"/></cfdi:Traslados>'
+                '<cfdi:Retenciones><cfdi:Retencion Base="{:.2f}" Impuesto="001" '
+                'TipoFactor="Tasa" TasaOCuota="0.100000" Importe="{:.2f}"/>'
+                "</cfdi:Retenciones></cfdi:Impuestos></cfdi:Concepto>".format(
+                    self.random.choice(CLAVES_PRODUCTO),
+                    cantidad,
+                    self.random.choice(CLAVES_UNIDAD),
+                    self.random.randrange(10000),
+                    valor_unitario,
+                    importe,
+                    importe,
+                    iva,
+                    importe,
+                    isr,
+                )
+            )
+
+        subtotal = round(subtotal, 2)
+        traslados = round(traslados, 2)
+        retenciones = round(retenciones, 2)
+        total = round(subtotal + traslados - retenciones, 2)
+
+        impuestos = (
+            '<cfdi:Impuestos TotalImpuestosRetenidos="{:.2f}" '
+            'TotalImpuestosTrasladados="{:.2f}"><cfdi:Retenciones>'
+            '<cfdi:Retencion Impuesto="001" Importe="{:.2f}"/></cfdi:Retenciones>'
+            '<cfdi:Traslados><cfdi:Traslado Base="{:.2f}" Impuesto="002" '
+            'TipoFactor="Tasa" TasaOCuota="0.160000" Importe="{:.2f}"/>'
+            "</cfdi:Traslados></cfdi:Impuestos>"
+        ).format(retenciones, traslados, retenciones, subtotal, traslados)
+
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<cfdi:Comprobante {} Version="4.0" Serie="A" Folio="{}" Fecha="{}" '
+            'Sello="{}" FormaPago="03" NoCertificado="30001000000500003416" '
+            'Certificado="{}" SubTotal="{:.2f}" Moneda="MXN" Total="{:.2f}" '
+            'TipoDeComprobante="I" Exportacion="01" MetodoPago="PUE" '
+            'LugarExpedicion="64000">{}{}<cfdi:Conceptos>{}</cfdi:Conceptos>{}'
+            "<cfdi:Complemento>{}</cfdi:Complemento></cfdi:Comprobante>"
+        ).format(
+            NAMESPACES,
+            self.random.randrange(1, 10 ** 6),
+            fecha,
+            SELLO,
+            CERTIFICADO,
+            subtotal,
+            total,
+            emisor,
+            receptor,
+            "".join(nodos),
+            impuestos,
+            self._timbre(fecha),
+        )
+
+    def pago(self, documentos: int = 5) -> str:
+        fecha = self._fecha()
+        emisor, receptor = self._partes("P", fecha)
+
+        nodos = []
+        monto = 0.0
+        base_iva = 0.0
+
+        for n in range(documentos):
+            base = round(self.random.uniform(100, 20000), 2)
+            iva = round(base * 0.16, 2)
+            pagado = round(base + iva, 2)
+            monto += pagado
+            base_iva += base
+
+            nodos.append(
+                '<pago20:DoctoRelacionado IdDocumento="{}" Serie="A" Folio="{}" '
+                'MonedaDR="MXN" EquivalenciaDR="1" NumParcialidad="1" '
+                'ImpSaldoAnt="{:.2f}" ImpPagado="{:.2f}" ImpSaldoInsoluto="0.00" '
+                'ObjetoImpDR="02"><pago20:ImpuestosDR><pago20:TrasladosDR>'
+                '<pago20:TrasladoDR BaseDR="{:.2f}" ImpuestoDR="002" '
+                'TipoFactorDR="Tasa" TasaOCuotaDR="0.160000" ImporteDR="{:.2f}"/>'
+                "</pago20:TrasladosDR></pago20:ImpuestosDR></pago20:DoctoRelacionado>".format(
+                    self._uuid(), n + 1, pagado, pagado, base, iva
+                )
+            )
+
+        monto = round(monto, 2)
+        base_iva = round(base_iva, 2)
+        iva_total = round(base_iva * 0.16, 2)
+
+        pagos = (
+            '<pago20:Pagos Version="2.0"><pago20:Totales '
+            'TotalTrasladosBaseIVA16="{:.2f}" TotalTrasladosImpuestoIVA16="{:.2f}" '
+            'MontoTotalPagos="{:.2f}"/><pago20:Pago FechaPago="{}" '
+            'FormaDePagoP="03" MonedaP="MXN" TipoCambioP="1" Monto="{:.2f}">{}'
+            "</pago20:Pago></pago20:Pagos>"
+        ).format(base_iva, iva_total, monto, fecha, monto, "".join(nodos))
+
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<cfdi:Comprobante {} Version="4.0" Serie="P" Folio="{}" Fecha="{}" '
+            'Sello="{}" NoCertificado="30001000000500003416" Certificado="{}" '
+            'SubTotal="0" Moneda="XXX" Total="0" TipoDeComprobante="P" '
+            'Exportacion="01" LugarExpedicion="64000">{}{}<cfdi:Conceptos>'
+            '<cfdi:Concepto ClaveProdServ="84111506" Cantidad="1" ClaveUnidad="ACT" '
+            'Descripcion="Pago" ValorUnitario="0" Importe="0" ObjetoImp="01"/>'
+            "</cfdi:Conceptos><cfdi:Complemento>{}{}</cfdi:Complemento>"
+            "</cfdi:Comprobante>"
+        ).format(
+            NAMESPACES,
+            self.random.randrange(1, 10 ** 6),
+            fecha,
+            SELLO,
+            CERTIFICADO,
+            emisor,
+            receptor,
+            pagos,
+            self._timbre(fecha),
+        )
+
+    def documentos(
+        self,
+        documentos: int = 100,
+        conceptos: int = 10,
+        doctos_relacionados: int = 5,
+        proporcion_pagos: float = 0.1,
+    ):
+        # Generador de (nombre, xml); proporcion_pagos de los documentos son
+        # complementos de pago y el resto ingresos
+        for n in range(documentos):
+            if self.random.random() < proporcion_pagos:
+                yield "P_{:07d}.xml".format(n), self.pago(doctos_relacionados)
+            else:
+                yield "I_{:07d}.xml".format(n), self.ingreso(conceptos)
+
+    def generar_zip(
+        self,
+        ruta: Union[str, Path],
+        documentos: int = 100,
+        conceptos: int = 10,
+        doctos_relacionados: int = 5,
+        proporcion_pagos: float = 0.1,
+        tamano_bytes: int = None,
+    ) -> Path:
+        # Con tamano_bytes se siguen agregando documentos hasta que el XML
+        # sin comprimir llega a ese tamaño (documentos se ignora)
+        ruta = Path(ruta)
+        total = 0
+
+        if tamano_bytes is not None:
+            documentos = 2 ** 31
+
+        with ZipFile(ruta, "w", ZIP_DEFLATED) as zip_file:
+            for nombre, xml in self.documentos(
+                documentos, conceptos, doctos_relacionados, proporcion_pagos
+            ):
+                zip_file.writestr(nombre, xml)
+                total += len(xml)
+                if tamano_bytes is not None and total >= tamano_bytes:
+                    break
+
+        return ruta
+
+
+def generar_zip(ruta: Union[str, Path], semilla: int = 2024, **kwargs) -> Path:
+    return GeneradorCorpus(semilla=semilla).generar_zip(ruta, **kwargs)
@@ -0,0 +1,229 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from zipfile import ZipFile
+
+cwd = Path(__file__).parent.parent
+
+sys.path.append(str(cwd))
+
+from benchmarks.corpus import generar_zip
+
+# Corre los benchmarks del pipeline sobre un corpus sintético y guarda
+# throughput y pico de memoria (RSS) en un JSON. Con --comparar se marca
+# como regresión cualquier benchmark cuyo throughput baje más de la
+# tolerancia respecto a un JSON anterior.
+#
+# Uso: python benchmarks/run.py --documentos 500 --conceptos 20 \
+#          --salida benchmarks/baseline.json --comparar benchmarks/baseline.json
+
+
+def _pico_rss_mb() -> float:
+    import resource
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def _leer_zip(ruta: str) -> list:
+    with ZipFile(ruta, "r") as zip_file:
+        return [
+            zip_file.read(n) for n in zip_file.namelist() if n.lower().endswith(".xml")
+        ]
+
+
+def bench_parse_from_xml(ruta: str) -> tuple:
+    from cfdi.cfdi import FacturaFiscal
+
+    documentos = _leer_zip(ruta)
+    inicio = time.perf_counter()
+    for xml in documentos:
+        FacturaFiscal.parse_from_xml(xml)
+    return time.perf_counter() - inicio, len(documentos)
+
+
+def bench_parse_from_xml_lxml(ruta: str) -> tuple:
+    # parse_from_xml usa ElementTree por omisión; éste fuerza lxml
+    from cfdi import xml_backend
+
+    if xml_backend.usar_backend("lxml") != "lxml":
+        raise ImportError("lxml no está instalado")
+    return bench_parse_from_xml(ruta)
+
+
+def bench_parse_from_xml_streaming(ruta: str) -> tuple:
+    from cfdi.cfdi import FacturaFiscal
+
+    documentos = _leer_zip(ruta)
+    inicio = time.perf_counter()
+    for xml in documentos:
+        FacturaFiscal.parse_from_xml(xml, streaming=True)
+    return time.perf_counter() - inicio, len(documentos)
+
+
+def bench_convertir_facturas_zip(ruta: str) -> tuple:
+    from cfdi import tools
+
+    inicio = time.perf_counter()
+    facturas = tools.convertir_facturas_zip(ruta, tipos=None)
+    return time.perf_counter() - inicio, len(facturas)
+
+
+def bench_exportar_facturas_excel(ruta: str) -> tuple:
+    from io import BytesIO
+    from cfdi import tools
+
+    facturas = tools.convertir_facturas_zip(ruta)
+    inicio = time.perf_counter()
+    tools.exportar_facturas_excel(facturas, salida=BytesIO())
+    return time.perf_counter() - inicio, len(facturas)
+
+
+def bench_convertirxml(ruta: str) -> tuple:
+    from comprobante_fiscal_sat import ComprobanteFiscal
+
+    documentos = [xml.decode("utf-8") for xml in _leer_zip(ruta)]
+    inicio = time.perf_counter()
+    for xml in documentos:
+        ComprobanteFiscal.convertirxml(xml=xml)
+    return time.perf_counter() - inicio, len(documentos)
+
+
+BENCHMARKS = {
+    "parse_from_xml": bench_parse_from_xml,
+    "parse_from_xml_lxml": bench_parse_from_xml_lxml,
+    "parse_from_xml_streaming": bench_parse_from_xml_streaming,
+    "convertir_facturas_zip": bench_convertir_facturas_zip,
+    "exportar_facturas_excel": bench_exportar_facturas_excel,
+    "convertirxml": bench_convertirxml,
+}
+
+
+def _ejecutar(nombre: str, ruta: str, cola):
+    # Cada benchmark corre en su propio proceso para que el pico de RSS sea
+    # sólo suyo
+    try:
+        segundos, documentos = BENCHMARKS[nombre](ruta)
+        cola.put(
+            {
+                "segundos": segundos,
+                "documentos": documentos,
+                "documentos_por_segundo": documentos / segundos if segundos else 0.0,
+                "pico_rss_mb": _pico_rss_mb(),
+            }
+        )
+    except ImportError as e:
+        cola.put({"omitido": str(e)})
+
+
+def correr(nombre: str, ruta: str, repeticiones: int) -> dict:
+    ctx = get_context("spawn")
+    mejor = None
+    for _ in range(repeticiones):
+        cola = ctx.Queue()
+        proceso = ctx.Process(target=_ejecutar, args=(nombre, ruta, cola))
+        proceso.start()
+        resultado = cola.get()
+        proceso.join()
+        if "omitido" in resultado:
+            return resultado
+        if mejor is None or resultado["segundos"] < mejor["segundos"]:
+            mejor = resultado
+    return mejor
+
+
+def comparar(actual: dict, anterior: dict, tolerancia: float) -> list:
+    regresiones = []
+    for nombre, resultado in actual["resultados"].items():
+        previo = anterior.get("resultados", {}).get(nombre)
+        if not previo or "omitido" in previo or "omitido" in resultado:
+            continue
+        cambio = resultado["documentos_por_segundo"] / previo["documentos_por_segundo"] - 1
+        if cambio < -tolerancia:
+            regresiones.append((nombre, cambio))
+    return regresiones
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline CFDI")
+    parser.add_argument("--documentos", type=int, default=300)
+    parser.add_argument("--conceptos", type=int, default=20)
+    parser.add_argument("--doctos", type=int, default=20, help="DoctoRelacionado por pago")
+    parser.add_argument("--proporcion-pagos", type=float, default=0.1)
+    parser.add_argument(
+        "--tamano-mb", type=float, default=None, help="Tamaño del XML sin comprimir"
+    )
+    parser.add_argument("--semilla", type=int, default=2024)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--solo", nargs="*", choices=list(BENCHMARKS), default=None)
+    parser.add_argument("--salida", default=None, help="JSON donde guardar resultados")
+    parser.add_argument("--comparar", default=None, help="JSON anterior a comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    # Se lee antes de escribir por si --salida y --comparar son el mismo archivo
+    anterior = None
+    if args.comparar and Path(args.comparar).exists():
+        anterior = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+
+    corpus = {
+        "documentos": args.documentos,
+        "conceptos": args.conceptos,
+        "doctos_relacionados": args.doctos,
+        "proporcion_pagos": args.proporcion_pagos,
+        "tamano_bytes": int(args.tamano_mb * 1024 * 1024) if args.tamano_mb else None,
+        "semilla": args.semilla,
+    }
+
+    with tempfile.TemporaryDirectory(prefix="cfdi_bench_") as directorio:
+        ruta = Path(directorio) / "corpus.zip"
+        generar_zip(ruta, **corpus)
+        corpus["zip_bytes"] = ruta.stat().st_size
+
+        reporte = {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "corpus": corpus,
+            "resultados": {},
+        }
+
+        for nombre in args.solo or BENCHMARKS:
+            resultado = correr(nombre, str(ruta), args.repeticiones)
+            reporte["resultados"][nombre] = resultado
+            if "omitido" in resultado:
+                print("{:<28} omitido ({})".format(nombre, resultado["omitido"]))
+            else:
+                print(
+                    "{:<28} {:>9.3f} s {:>10.1f} docs/s {:>8.1f} MB RSS".format(
+                        nombre,
+                        resultado["segundos"],
+                        resultado["documentos_por_segundo"],
+                        resultado["pico_rss_mb"],
+                    )
+                )
+
+    if args.salida:
+        Path(args.salida).write_text(
+            json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+
+    if anterior is not None:
+        regresiones = comparar(reporte, anterior, args.tolerancia)
+        for nombre, cambio in regresiones:
+            print("REGRESIÓN {}: {:.1%} docs/s".format(nombre, cambio))
+        if regresiones:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import pickle
+import sqlite3
+import time
+from hashlib import sha256
+from pathlib import Path
+from typing import Union, Callable, Any
+
+
+class CacheFacturas:
+    """Cache en disco (SQLite) de documentos ya parseados.
+
+    La llave es el SHA-256 de los bytes del XML; además se guarda el UUID
+    del timbre para poder buscar por él. Cuando el tamaño total de los
+    objetos guardados pasa de tamano_max bytes se eliminan los menos usados.
+    """
+
+    COMMIT_CADA = 500
+
+    def __init__(
+        self,
+        ruta: Union[str, Path] = "cfdi_cache.sqlite",
+        tamano_max: int = 512 * 1024 * 1024,
+        espacio: str = "facturas",
+    ):
+        # espacio separa objetos de distinto tipo creados desde el mismo XML
+        # (FacturaFiscal y ComprobanteFiscal pueden compartir archivo). Es el
+        # espacio por omisión; cada operación puede pedir otro con espacio=.
+        self.ruta = str(ruta)
+        self.tamano_max = tamano_max
+        self.espacio = espacio
+        self.aciertos = 0
+        self.fallos = 0
+        self._pendientes = 0
+
+        self.cxn = sqlite3.connect(self.ruta)
+        self.cxn.execute("PRAGMA journal_mode=WAL")
+        self.cxn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS documentos (
+                hash TEXT NOT NULL,
+                espacio TEXT NOT NULL,
+                uuid TEXT,
+                objeto BLOB,
+                tamano INTEGER NOT NULL,
+                ultimo_acceso REAL NOT NULL,
+                PRIMARY KEY (hash, espacio)
+            )
+            """
+        )
+        self.cxn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documentos_uuid ON documentos (uuid)"
+        )
+        self.cxn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documentos_acceso ON documentos (ultimo_acceso)"
+        )
+        self.tamano = self.cxn.execute(
+            "SELECT COALESCE(SUM(tamano), 0) FROM documentos"
+        ).fetchone()[0]
+
+    def __enter__(self) -> "CacheFacturas":
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+    @staticmethod
+    def calcular_hash(contenido: Union[str, bytes]) -> str:
+        if isinstance(contenido, str):
+            contenido = contenido.encode("utf-8")
+        return sha256(contenido).hexdigest()
+
+    def _leer(self, where: str, param: str, espacio: str = None) -> tuple:
+        espacio = espacio or self.espacio
+        row = self.cxn.execute(
+            "SELECT hash, objeto FROM documentos WHERE {} = ? AND espacio = ?".format(
+                where
+            ),
+            (param, espacio),
+        ).fetchone()
+
+        if row is None:
+            self.fallos += 1
+            return False, None
+
+        self.aciertos += 1
+        self.cxn.execute(
+            "UPDATE documentos SET ultimo_acceso = ? WHERE hash = ? AND espacio = ?",
+            (time.time(), row[0], espacio),
+        )
+        self._registrar_cambio()
+        return True, pickle.loads(row[1])
+
+    def obtener(self, contenido: Union[str, bytes], espacio: str = None) -> tuple:
+        # Regresa (encontrado, objeto); el objeto guardado puede ser None
+        # para documentos que no generan factura (ej. complementos de pago)
+        return self._leer("hash", self.calcular_hash(contenido), espacio)
+
+    def buscar_uuid(self, uuid: str, espacio: str = None) -> tuple:
+        return self._leer("uuid", uuid, espacio)
+
+    def guardar(
+        self,
+        contenido: Union[str, bytes],
+        objeto: Any,
+        uuid: str = None,
+        espacio: str = None,
+    ):
+        espacio = espacio or self.espacio
+        if uuid is None:
+            uuid = getattr(objeto, "uuid", None) or None
+
+        datos = pickle.dumps(objeto, protocol=pickle.HIGHEST_PROTOCOL)
+        clave = self.calcular_hash(contenido)
+
+        anterior = self.cxn.execute(
+            "SELECT tamano FROM documentos WHERE hash = ? AND espacio = ?",
+            (clave, espacio),
+        ).fetchone()
+        if anterior is not None:
+            self.tamano -= anterior[0]
+
+        self.cxn.execute(
+            "INSERT OR REPLACE INTO documentos VALUES (?, ?, ?, ?, ?, ?)",
+            (clave, espacio, uuid, datos, len(datos), time.time()),
+        )
+        self.tamano += len(datos)
+
+        if self.tamano > self.tamano_max:
+            self._desalojar()
+
+        self._registrar_cambio()
+
+    def obtener_o_parsear(
+        self,
+        contenido: Union[str, bytes],
+        parse: Callable[[Union[str, bytes]], Any],
+        espacio: str = None,
+    ) -> Any:
+        encontrado, objeto = self.obtener(contenido, espacio)
+        if not encontrado:
+            objeto = parse(contenido)
+            self.guardar(contenido, objeto, espacio=espacio)
+        return objeto
+
+    def _desalojar(self):
+        # Se eliminan los documentos menos usados hasta dejar el cache al 90%
+        objetivo = int(self.tamano_max * 0.9)
+        cursor = self.cxn.execute(
+            "SELECT hash, espacio, tamano FROM documentos ORDER BY ultimo_acceso"
+        )
+        eliminar = []
+        for clave, espacio, tamano in cursor:
+            if self.tamano <= objetivo:
+                break
+            eliminar.append((clave, espacio))
+            self.tamano -= tamano
+
+        self.cxn.executemany(
+            "DELETE FROM documentos WHERE hash = ? AND espacio = ?", eliminar
+        )
+
+    def _registrar_cambio(self):
+        self._pendientes += 1
+        if self._pendientes >= self.COMMIT_CADA:
+            self.cxn.commit()
+            self._pendientes = 0
+
+    def estadisticas(self) -> dict:
+        total = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / total if total else 0.0,
+            "tamano": self.tamano,
+            "tamano_max": self.tamano_max,
+        }
+
+    def cerrar(self):
+        self.cxn.commit()
+        self.cxn.close()
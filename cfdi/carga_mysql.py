@@ -0,0 +1,301 @@
+import threading
+from collections import deque
+from pathlib import Path
+from queue import Queue
+from typing import Union
+
+from .columnar import (
+    COLUMNAS_FACTURAS,
+    COLUMNAS_CONCEPTOS,
+    COLUMNAS_IMPUESTOS,
+    _filas_factura,
+)
+from .tools import TIPOS_RELACION, _incluir, _parse_lote_zip
+
+# Carga directa ZIP -> MySQL (evschema). Los XML del ZIP se dividen en lotes
+# fijos en el orden del archivo; cada lote se inserta con Database.bulk
+# (executemany) en una sola conexión y transacción, junto con el número de
+# documentos del ZIP ya procesados en la tabla de control. Si la carga
+# falla, la siguiente llamada continúa después del último documento
+# confirmado, aunque se use otro tamano_lote.
+
+TABLAS = {
+    "facturas": """
+        CREATE TABLE IF NOT EXISTS {db}.{tabla} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            uuid CHAR(36) NOT NULL,
+            fecha DATETIME NULL,
+            serie VARCHAR(25) NULL,
+            folio VARCHAR(40) NULL,
+            tipo_comprobante CHAR(1) NULL,
+            moneda VARCHAR(5) NULL,
+            tipo_cambio DECIMAL(18, 6) NULL,
+            subtotal DECIMAL(18, 6) NULL,
+            total DECIMAL(18, 6) NULL,
+            emisor_rfc VARCHAR(13) NULL,
+            emisor_nombre VARCHAR(300) NULL,
+            receptor_rfc VARCHAR(13) NULL,
+            receptor_nombre VARCHAR(300) NULL,
+            uso_cfdi VARCHAR(5) NULL,
+            UNIQUE INDEX idx_{tabla}_uuid (uuid),
+            INDEX idx_{tabla}_fecha (fecha)
+        )
+    """,
+    "conceptos": """
+        CREATE TABLE IF NOT EXISTS {db}.{tabla} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            uuid CHAR(36) NOT NULL,
+            concepto INT NOT NULL,
+            clave_producto_servicio VARCHAR(10) NULL,
+            cantidad DECIMAL(18, 6) NULL,
+            clave_unidad VARCHAR(10) NULL,
+            descripcion TEXT NULL,
+            valor_unitario DECIMAL(18, 6) NULL,
+            importe DECIMAL(18, 6) NULL,
+            UNIQUE INDEX idx_{tabla}_uuid (uuid, concepto)
+        )
+    """,
+    "impuestos": """
+        CREATE TABLE IF NOT EXISTS {db}.{tabla} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            uuid CHAR(36) NOT NULL,
+            concepto INT NOT NULL,
+            tipo VARCHAR(10) NULL,
+            impuesto INT NULL,
+            base DECIMAL(18, 6) NULL,
+            tasa_o_cuota DECIMAL(10, 6) NULL,
+            importe DECIMAL(18, 6) NULL,
+            orden INT NOT NULL,
+            UNIQUE INDEX idx_{tabla}_uuid (uuid, concepto, orden)
+        )
+    """,
+    "cargas": """
+        CREATE TABLE IF NOT EXISTS {db}.{tabla} (
+            archivo VARCHAR(255) NOT NULL,
+            tamano BIGINT NOT NULL,
+            documentos INT NOT NULL,
+            facturas INT NOT NULL,
+            actualizado DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (archivo, tamano)
+        )
+    """,
+}
+
+# orden: posición del impuesto entre los de su factura, para que el índice
+# único distinga impuestos iguales del mismo concepto
+COLUMNAS_IMPUESTOS_MYSQL = COLUMNAS_IMPUESTOS + ["orden"]
+
+
+def crear_tablas(db, prefijo: str = "cfdi_"):
+    # Crea las tablas de facturas, conceptos, impuestos y control de cargas
+    for nombre, query in TABLAS.items():
+        result = db.commit(
+            query=query.format(db=db.config.database, tabla=prefijo + nombre)
+        )
+        if result.error:
+            raise RuntimeError(result.message)
+
+
+def _avance(db, tabla: str, archivo: str, tamano: int) -> tuple:
+    # (documentos del ZIP ya procesados, facturas cargadas) del archivo;
+    # (0, 0) si no se ha cargado
+    with db.transaction() as cxn:
+        cxn.cursor.execute(
+            "SELECT documentos, facturas FROM {}.{} WHERE archivo = %s AND tamano = %s".format(
+                db.config.database, tabla
+            ),
+            (archivo, tamano),
+        )
+        row = cxn.cursor.fetchone()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def _filas_lote(resultados: list, tipos: tuple, errores: list) -> tuple:
+    facturas, conceptos, impuestos = [], [], []
+    for nombre, factura in resultados:
+        if not _incluir(factura, tipos):
+            continue
+        if not factura.uuid:
+            # Sin timbre no hay UUID y el índice único dejaría sólo la primera
+            errores.append((nombre, "El CFDI no tiene TimbreFiscalDigital (UUID)"))
+            continue
+        fila_factura, filas_conceptos, filas_impuestos = _filas_factura(factura)
+        facturas.append(fila_factura)
+        conceptos.extend(filas_conceptos)
+        impuestos.extend(fila + (orden,) for orden, fila in enumerate(filas_impuestos))
+    return facturas, conceptos, impuestos
+
+
+def _producir(
+    ruta: str,
+    lotes: list,
+    desde: int,
+    workers: int,
+    tipos: tuple,
+    cola: Queue,
+    detener: threading.Event,
+):
+    # Parsea los lotes pendientes y los deja en la cola en orden. Con
+    # workers > 1 se parsean en procesos, con a lo más 2 * workers lotes en
+    # vuelo para no acumular resultados si la base va más lenta.
+    try:
+        pendientes = range(desde, len(lotes))
+
+        if workers is None or workers <= 1:
+            for n in pendientes:
+                if detener.is_set():
+                    return
+                resultados, errores = _parse_lote_zip(ruta, lotes[n])
+                cola.put((n, _filas_lote(resultados, tipos, errores), errores))
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            en_vuelo = deque()
+            for n in pendientes:
+                if detener.is_set():
+                    break
+                en_vuelo.append((n, pool.submit(_parse_lote_zip, ruta, lotes[n])))
+                if len(en_vuelo) >= 2 * workers:
+                    n, futuro = en_vuelo.popleft()
+                    resultados, errores = futuro.result()
+                    cola.put((n, _filas_lote(resultados, tipos, errores), errores))
+            while en_vuelo and not detener.is_set():
+                n, futuro = en_vuelo.popleft()
+                resultados, errores = futuro.result()
+                cola.put((n, _filas_lote(resultados, tipos, errores), errores))
+            for _, futuro in en_vuelo:
+                futuro.cancel()
+    except Exception as e:
+        cola.put(e)
+    finally:
+        cola.put(None)
+
+
+def cargar_facturas_zip_mysql(
+    file: Union[str, Path] = None,
+    db=None,
+    tamano_lote: int = 500,
+    workers: int = None,
+    tipos: tuple = TIPOS_RELACION,
+    errores: list = None,
+    prefijo: str = "cfdi_",
+    reanudar: bool = True,
+):
+    # file: ruta del ZIP. db: evschema Database (o DBConfig). tamano_lote:
+    # XML por lote y por transacción. workers: procesos para parsear; None
+    # parsea en un hilo. Mientras un lote se inserta el siguiente ya se está
+    # parseando (productor/consumidor con una cola acotada). errores: lista
+    # donde se agregan (archivo, mensaje) de los XML que no se pudieron
+    # parsear o que no tienen timbre (UUID). reanudar: continúa después del
+    # último documento confirmado del mismo archivo; con False se vuelve a
+    # cargar desde el principio (las facturas, conceptos e impuestos
+    # repetidos se ignoran por sus índices únicos).
+    # Regresa un DBResult; si falla un lote, error es True y los lotes
+    # anteriores ya quedaron guardados.
+    from zipfile import ZipFile
+    from evschema.evtypes import DBResult
+
+    result = DBResult()
+
+    if file is None:
+        result.error = True
+        result.message = "Debe de enviar un archivo o ruta del archivo."
+        return result
+
+    file = Path(file)
+    if not file.exists():
+        result.error = True
+        result.message = "El archivo en la ruta {} no existe".format(file)
+        return result
+
+    if not hasattr(db, "bulk"):
+        from evschema.database import Database
+
+        db = Database(config=db)
+
+    if errores is None:
+        errores = []
+
+    crear_tablas(db, prefijo)
+    tabla_cargas = prefijo + "cargas"
+    archivo = str(file.resolve())[-255:]
+    tamano = file.stat().st_size
+
+    with ZipFile(file, "r") as zip_file:
+        nombres = [n for n in zip_file.namelist() if n.lower().endswith(".xml")]
+
+    hechos, cargadas = _avance(db, tabla_cargas, archivo, tamano) if reanudar else (0, 0)
+    # Los lotes empiezan en el primer documento pendiente
+    lotes = [
+        nombres[i : i + tamano_lote] for i in range(hechos, len(nombres), tamano_lote)
+    ]
+    ultimo = -1
+
+    cola: Queue = Queue(maxsize=4)
+    detener = threading.Event()
+    productor = threading.Thread(
+        target=_producir,
+        args=(str(file), lotes, 0, workers, tipos, cola, detener),
+        daemon=True,
+    )
+    productor.start()
+
+    tablas = (
+        (prefijo + "facturas", COLUMNAS_FACTURAS),
+        (prefijo + "conceptos", COLUMNAS_CONCEPTOS),
+        (prefijo + "impuestos", COLUMNAS_IMPUESTOS_MYSQL),
+    )
+    query_carga = (
+        "INSERT INTO {}.{} (archivo, tamano, documentos, facturas) VALUES (%s, %s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE documentos = VALUES(documentos), facturas = VALUES(facturas)"
+    ).format(db.config.database, tabla_cargas)
+
+    try:
+        while True:
+            elemento = cola.get()
+            if elemento is None:
+                break
+            if isinstance(elemento, Exception):
+                raise elemento
+
+            n, filas, errores_lote = elemento
+            errores.extend(errores_lote)
+
+            with db.transaction() as cxn:
+                for (tabla, columnas), registros in zip(tablas, filas):
+                    if not registros:
+                        continue
+                    r = db.bulk(tabla, [columnas] + registros, connection=cxn)
+                    if r.error:
+                        raise RuntimeError(r.message)
+                cxn.cursor.execute(
+                    query_carga,
+                    (archivo, tamano, hechos + len(lotes[n]), cargadas + len(filas[0])),
+                )
+
+            hechos += len(lotes[n])
+            cargadas += len(filas[0])
+            ultimo = n
+    except Exception as e:
+        result.error = True
+        result.message = "Error en el lote {} de {}: {}".format(ultimo + 2, len(lotes), e)
+    else:
+        result.error = False
+        result.message = "Lotes cargados: {}; Facturas: {}".format(len(lotes), cargadas)
+    finally:
+        detener.set()
+        # Se vacía la cola para que el productor no se quede bloqueado
+        while productor.is_alive():
+            while not cola.empty():
+                cola.get_nowait()
+            productor.join(timeout=0.1)
+
+    result.data = {
+        "lote": ultimo,
+        "lotes": len(lotes),
+        "documentos": hechos,
+        "facturas": cargadas,
+    }
+    return result
@@ -1,8 +1,37 @@
+import sys
+import weakref
+from time import perf_counter
 from datetime import datetime
 from typing import List, Optional
 from dataclasses import dataclass
 import xml.etree.ElementTree as ET
 
+from . import xml_backend
+
+from sat_xml.etiquetas import (
+    NS_CFDI,
+    NS_TFD,
+    NS_PAGO,
+    NS_NOMINA,
+    TAG_COMPROBANTE,
+    TAG_EMISOR,
+    TAG_RECEPTOR,
+    TAG_CONCEPTOS,
+    TAG_CONCEPTO,
+    TAG_IMPUESTOS,
+    TAG_TRASLADO,
+    TAG_RETENCION,
+    TAG_COMPLEMENTO,
+    TAG_TIMBRE,
+    TAG_PAGOS,
+    TAG_PAGO,
+    TAG_DOCTO_RELACIONADO,
+    TAG_NOMINA,
+    RUTA_TIMBRE,
+    RUTA_PAGOS,
+    RUTA_NOMINA,
+)
+
 catalogo_impuestos = {
     "retencion": {
         "1": {"clave": "isr", "descripcion": "Retención de ISR", "tasa": 0.08},
@@ -17,7 +46,7 @@ catalogo_impuestos = {
 }
 
 
-@dataclass
+@dataclass(slots=True, weakref_slot=True)
 class Emisor:
     rfc: str
     nombre: str
@@ -26,7 +55,7 @@ class Emisor:
     codigo_postal: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True, weakref_slot=True)
 class Receptor:
     rfc: str
     nombre: str
@@ -35,7 +64,7 @@ class Receptor:
     codigo_postal: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Impuesto:
     tipo: str
     base: float
@@ -44,7 +73,7 @@ class Impuesto:
     tasa_o_cuota: float
 
 
-@dataclass
+@dataclass(slots=True)
 class Concepto:
     clave_producto_servicio: str
     cantidad: float
@@ -55,7 +84,42 @@ class Concepto:
     impuestos: List[Impuesto]
 
 
-@dataclass
+@dataclass(slots=True)
+class DoctoRelacionado:
+    id_documento: str
+    serie: Optional[str]
+    folio: Optional[str]
+    moneda: str
+    equivalencia: float
+    num_parcialidad: int
+    saldo_anterior: float
+    importe_pagado: float
+    saldo_insoluto: float
+
+
+@dataclass(slots=True)
+class Pago:
+    fecha_pago: datetime
+    forma_pago: str
+    moneda: str
+    tipo_cambio: Optional[float]
+    monto: float
+    documentos: List[DoctoRelacionado]
+
+
+@dataclass(slots=True)
+class Nomina:
+    tipo_nomina: str
+    fecha_pago: Optional[datetime]
+    fecha_inicial_pago: Optional[datetime]
+    fecha_final_pago: Optional[datetime]
+    num_dias_pagados: float
+    total_percepciones: float
+    total_deducciones: float
+    total_otros_pagos: float
+
+
+@dataclass(slots=True)
 class Complemento:
     tipo: str  # Ej: "TimbreFiscalDigital"
     uuid: str
@@ -64,7 +128,46 @@ class Complemento:
     sello_cfd: str
 
 
+# Emisores y receptores compartidos en modo compacto; se liberan solos cuando
+# ninguna factura los usa
+_emisores = weakref.WeakValueDictionary()
+_receptores = weakref.WeakValueDictionary()
+
+
+def _intern(valor: Optional[str]) -> Optional[str]:
+    return sys.intern(valor) if valor else valor
+
+
 class FacturaFiscal:
+    __slots__ = (
+        "version",
+        "serie",
+        "folio",
+        "fecha",
+        "sello",
+        "uuid",
+        "forma_pago",
+        "metodo_pago",
+        "tipo_comprobante",
+        "lugar_expedicion",
+        "moneda",
+        "tipo_cambio",
+        "subtotal",
+        "descuento",
+        "total",
+        "emisor",
+        "receptor",
+        "conceptos",
+        "complementos",
+        "xml_string",
+        "impuestos",
+        "pagos",
+        "nomina",
+    )
+
+    # Es el mismo catálogo para todas las facturas
+    catalogo_impuestos = catalogo_impuestos
+
     def __init__(self):
         self.version: str = "4.0"  # Versión del CFDI
         self.serie: Optional[str] = None
@@ -74,7 +177,7 @@ class FacturaFiscal:
         self.uuid: str = ""  # UUID del CFDI
         self.forma_pago: str = ""  # Clave SAT forma pago
         self.metodo_pago: str = ""  # Clave SAT método pago
-        self.tipo_comprobante: str = "I"  # I=Ingreso, E=Egreso, T=Traslado
+        self.tipo_comprobante: str = "I"  # I=Ingreso, E=Egreso, T=Traslado, P=Pago, N=Nómina
         self.lugar_expedicion: str = ""  # Código postal
         self.moneda: str = "MXN"
         self.tipo_cambio: Optional[float] = None
@@ -86,151 +189,337 @@ class FacturaFiscal:
         self.conceptos: List[Concepto] = []
         self.complementos: List[Complemento] = []
         self.xml_string: str = None
-        self.catalogo_impuestos = catalogo_impuestos
         self.impuestos: List[Impuesto] = []
+        self.pagos: List[Pago] = []  # Complemento de pagos (tipo P)
+        self.nomina: Optional[Nomina] = None  # Complemento de nómina (tipo N)
 
     def agregar_concepto(self, concepto: Concepto):
         self.conceptos.append(concepto)
         self.subtotal += concepto.importe
         # Aquí deberías actualizar también los impuestos
 
+    def compactar(self) -> "FacturaFiscal":
+        """Reduce la memoria de la factura para cargas grandes.
+
+        Descarta el XML original, internaliza RFC, nombres y claves, y
+        reutiliza un solo Emisor/Receptor por cada combinación de datos.
+        """
+        self.xml_string = None
+        self.moneda = _intern(self.moneda)
+
+        emisor = self.emisor
+        if emisor is not None:
+            llave = (
+                emisor.rfc,
+                emisor.nombre,
+                emisor.regimen_fiscal,
+                emisor.domicilio_fiscal,
+                emisor.codigo_postal,
+            )
+            compartido = _emisores.get(llave)
+            if compartido is None:
+                emisor.rfc = _intern(emisor.rfc)
+                emisor.nombre = _intern(emisor.nombre)
+                emisor.regimen_fiscal = _intern(emisor.regimen_fiscal)
+                _emisores[llave] = compartido = emisor
+            self.emisor = compartido
+
+        receptor = self.receptor
+        if receptor is not None:
+            llave = (
+                receptor.rfc,
+                receptor.nombre,
+                receptor.uso_cfdi,
+                receptor.domicilio,
+                receptor.codigo_postal,
+            )
+            compartido = _receptores.get(llave)
+            if compartido is None:
+                receptor.rfc = _intern(receptor.rfc)
+                receptor.nombre = _intern(receptor.nombre)
+                receptor.uso_cfdi = _intern(receptor.uso_cfdi)
+                _receptores[llave] = compartido = receptor
+            self.receptor = compartido
+
+        for concepto in self.conceptos:
+            concepto.clave_producto_servicio = _intern(concepto.clave_producto_servicio)
+            concepto.clave_unidad = _intern(concepto.clave_unidad)
+
+        return self
+
     @staticmethod
     def obtener_impuestos_xml(
         tree: ET.Element, namespaces: dict = {}
     ) -> List[Impuesto]:
         total_impuestos: List[Impuesto] = []
 
-        for impuesto in tree.findall(".//cfdi:Traslado", namespaces):
-            _impuesto = Impuesto(
-                tipo="traslado",
-                importe=float(impuesto.attrib.get("Importe", 0.0)),
-                impuesto=int(impuesto.attrib.get("Impuesto", "000")),
-                base=float(impuesto.attrib.get("Base", 0.0)),
-                tasa_o_cuota=float(impuesto.attrib.get("TasaOCuota", 0.0)),
-            )
-            total_impuestos.append(_impuesto)
-
-        for impuesto in tree.findall(".//cfdi:Retencion", namespaces):
-            _impuesto = Impuesto(
-                tipo="retencion",
-                importe=float(impuesto.attrib.get("Importe", 0.0)),
-                impuesto=int(impuesto.attrib.get("Impuesto", "000")),
-                base=float(impuesto.attrib.get("Base", 0.0)),
-                tasa_o_cuota=float(impuesto.attrib.get("TasaOCuota", 0.0)),
-            )
-            total_impuestos.append(_impuesto)
+        for impuesto in tree.iter(TAG_TRASLADO):
+            total_impuestos.append(crear_impuesto("traslado", impuesto))
+
+        for impuesto in tree.iter(TAG_RETENCION):
+            total_impuestos.append(crear_impuesto("retencion", impuesto))
 
         return total_impuestos
 
     @staticmethod
     def crear_factura(tree: ET.Element, namespaces: dict = {}) -> "FacturaFiscal":
+        # Datos comunes a todos los tipos de comprobante. Los nodos se buscan
+        # como hijos directos con el nombre ya calificado (ver TAG_*), sin
+        # recorrer todo el documento.
         factura = FacturaFiscal()
-        timbrefiscal = tree.find(".//tfd:TimbreFiscalDigital", namespaces)
+        timbrefiscal = tree.find(RUTA_TIMBRE)
         if timbrefiscal is not None:
-            factura.uuid = timbrefiscal.attrib.get("UUID", "")
-            factura.fecha = (
-                datetime.fromisoformat(timbrefiscal.attrib.get("FechaTimbrado"))
-                if timbrefiscal.attrib.get("FechaTimbrado")
-                else datetime.now()
-            )
-            factura.sello = timbrefiscal.attrib.get("SelloCFD", "")
-
-        # Ejemplo de parseo básico (debería ajustarse según el XML real)
-        factura.serie = tree.attrib.get("Serie")
-        factura.folio = tree.attrib.get("Folio")
-        factura.fecha = (
-            datetime.fromisoformat(tree.attrib.get("Fecha"))
-            if tree.attrib.get("Fecha")
-            else datetime.now()
-        )
-        factura.moneda = tree.attrib.get("Moneda", "MXN")
-        factura.tipo_cambio = (
-            float(tree.attrib.get("TipoCambio"))
-            if tree.attrib.get("TipoCambio")
-            else None
-        )
-        factura.subtotal = float(tree.attrib.get("SubTotal", 0))
-        factura.total = float(tree.attrib.get("Total", 0))
+            factura.uuid = timbrefiscal.get("UUID", "")
+            factura.sello = timbrefiscal.get("SelloCFD", "")
+
+        attrib = tree.attrib
+        fecha = attrib.get("Fecha")
+        tipo_cambio = attrib.get("TipoCambio")
+        descuento = attrib.get("Descuento")
+
+        factura.version = attrib.get("Version", "4.0")
+        factura.serie = attrib.get("Serie")
+        factura.folio = attrib.get("Folio")
+        factura.fecha = datetime.fromisoformat(fecha) if fecha else datetime.now()
+        factura.forma_pago = attrib.get("FormaPago", "")
+        factura.metodo_pago = attrib.get("MetodoPago", "")
+        factura.lugar_expedicion = attrib.get("LugarExpedicion", "")
+        factura.moneda = attrib.get("Moneda", "MXN")
+        factura.tipo_cambio = float(tipo_cambio) if tipo_cambio else None
+        factura.subtotal = float(attrib.get("SubTotal", 0))
+        factura.descuento = float(descuento) if descuento else None
+        factura.total = float(attrib.get("Total", 0))
+        factura.tipo_comprobante = attrib.get("TipoDeComprobante", "I")
 
         # Parseo de emisor
-        emisor_elem = tree.find(".//cfdi:Emisor", namespaces)
+        emisor_elem = tree.find(TAG_EMISOR)
 
         if emisor_elem is not None:
-            factura.emisor = Emisor(
-                rfc=emisor_elem.attrib.get("Rfc", ""),
-                nombre=emisor_elem.attrib.get("Nombre", ""),
-                regimen_fiscal=emisor_elem.attrib.get("RegimenFiscal", ""),
-                domicilio_fiscal=emisor_elem.attrib.get("DomicilioFiscal", None),
-                codigo_postal=emisor_elem.attrib.get("CodigoPostal", None),
-            )
+            factura.emisor = crear_emisor(emisor_elem)
 
         # Parseo de receptor
-        receptor_elem = tree.find(".//cfdi:Receptor", namespaces)
+        receptor_elem = tree.find(TAG_RECEPTOR)
 
         if receptor_elem is not None:
-            factura.receptor = Receptor(
-                rfc=receptor_elem.attrib.get("Rfc", ""),
-                nombre=receptor_elem.attrib.get("Nombre", ""),
-                uso_cfdi=receptor_elem.attrib.get("UsoCFDI", ""),
-                domicilio=receptor_elem.attrib.get("Domicilio", None),
-                codigo_postal=receptor_elem.attrib.get("CodigoPostal", None),
-            )
+            factura.receptor = crear_receptor(receptor_elem)
 
-        # Parseo de impuestos de la factura completa
-        impuestos_tree = tree.find(".//cfdi:Impuestos", namespaces)
+        # Parseo de impuestos de la factura completa (hijo directo del comprobante,
+        # ".//" encontraba primero los impuestos del primer concepto)
+        impuestos_tree = tree.find(TAG_IMPUESTOS)
         if impuestos_tree is not None:
-            factura.impuestos = FacturaFiscal.obtener_impuestos_xml(
-                impuestos_tree, namespaces
-            )
+            factura.impuestos = FacturaFiscal.obtener_impuestos_xml(impuestos_tree)
 
         # Parseo de conceptos
-        conceptos_elem = tree.find(".//cfdi:Conceptos", namespaces)
+        conceptos_elem = tree.find(TAG_CONCEPTOS)
 
         if conceptos_elem is not None:
-            for concepto_elem in conceptos_elem.findall(".//cfdi:Concepto", namespaces):
+            for concepto_elem in conceptos_elem.iterfind(TAG_CONCEPTO):
                 
                 total_impuestos: List[Impuesto] = FacturaFiscal.obtener_impuestos_xml(
-                    concepto_elem, namespaces
+                    concepto_elem
                 )
+                factura.conceptos.append(crear_concepto(concepto_elem, total_impuestos))
 
-                concepto = Concepto(
-                    clave_producto_servicio=concepto_elem.attrib.get(
-                        "ClaveProdServ", ""
-                    ),
-                    cantidad=float(concepto_elem.attrib.get("Cantidad", 0)),
-                    clave_unidad=concepto_elem.attrib.get("ClaveUnidad", ""),
-                    descripcion=concepto_elem.attrib.get("Descripcion", ""),
-                    valor_unitario=float(concepto_elem.attrib.get("ValorUnitario", 0)),
-                    importe=float(concepto_elem.attrib.get("Importe", 0)),
-                    impuestos=total_impuestos,
-                )
-                factura.conceptos.append(concepto)
-
-        # Nota: El parseo de impuestos y complementos debe implementarse según la estructura real del XML CFDI.
         return factura
 
     @staticmethod
-    def parse_from_xml(xml_string: str) -> "FacturaFiscal":
-        # Esta función debe parsear el XML CFDI y poblar una instancia de FacturaFiscal.
-        # Aquí solo se muestra un esqueleto básico.
+    def parse_from_xml(
+        xml_string: str,
+        streaming: bool = False,
+        compacto: bool = False,
+        metricas=None,
+        perezoso: bool = False,
+    ) -> "FacturaFiscal":
+        # Parsea el XML una sola vez y pasa el elemento raíz al constructor
+        # registrado para su TipoDeComprobante (ver registrar_tipo). Regresa
+        # None si el tipo no está registrado.
+        # Con streaming=True se usa el parser de una sola pasada (cfdi.parser),
+        # que no construye el árbol de elementos: baja el pico de memoria
+        # pero es algo más lento.
+        # Con compacto=True la factura se regresa compactada (ver compactar).
+        # metricas: cfdi.metricas.Metricas para medir el tiempo de parseo.
+        # Con perezoso=True los campos se convierten hasta que se leen y los
+        # conceptos e impuestos ni se recorren hasta entonces (ver
+        # cfdi.perezoso); siempre usa el parser de árbol.
+
+        if metricas is not None:
+            inicio = perf_counter()
+            comprobante = FacturaFiscal.parse_from_xml(
+                xml_string, streaming, compacto, perezoso=perezoso
+            )
+            segundos = perf_counter() - inicio
+            metricas.tiempo("parse", segundos)
+            metricas.documento(comprobante.uuid if comprobante else "", segundos)
+            return comprobante
 
-        tree = ET.fromstring(xml_string)
+        comprobante = None
 
-        namespaces = {
-            "cfdi": "http://www.sat.gob.mx/cfd/4",
-            "tfd": "http://www.sat.gob.mx/TimbreFiscalDigital",
-        }
+        if streaming and not perezoso:
+            from .parser import parse_factura_stream, TIPOS_STREAMING
 
-        tipo_comprobante = tree.attrib.get("TipoDeComprobante")
+            comprobante = parse_factura_stream(xml_string)
+            if comprobante is None:
+                return None
+            tipo_comprobante = comprobante.tipo_comprobante
+            constructor = constructores_tipo.get(tipo_comprobante)
 
-        if tipo_comprobante == "P":
-            print("Es un complemento de pago")
-        elif tipo_comprobante == "I":
-            comprobante = FacturaFiscal.crear_factura(tree, namespaces)
-            comprobante.xml_string = xml_string
-            return comprobante
+            if constructor is None:
+                return None
+            if constructor is not TIPOS_STREAMING.get(tipo_comprobante):
+                # Constructor agregado por el usuario; necesita el árbol
+                comprobante = None
+
+        if comprobante is None:
+            tree = xml_backend.fromstring(xml_string)
+            constructor = constructores_tipo.get(tree.get("TipoDeComprobante"))
+
+            if constructor is None:
+                return None
+
+            if perezoso:
+                from .perezoso import FacturaFiscalPerezosa
+
+                comprobante = FacturaFiscalPerezosa(tree, xml_string)
+            else:
+                comprobante = FacturaFiscal.crear_factura(tree)
+            constructor(tree, comprobante)
+
+        if compacto:
+            return comprobante.compactar()
+        comprobante.xml_string = xml_string
+        return comprobante
 
     def validar(self) -> bool:
         """Valida que la factura cumpla con los requisitos mínimos del SAT"""
-        # Implementar validaciones según reglas del SAT
-        return True
+        # Para validar muchas facturas usar cfdi.validacion.validar_lote
+        from .validacion import validar_lote
+
+        return not validar_lote([self])[0]
+
+
+# Constructores por TipoDeComprobante. Cada uno recibe el elemento raíz ya
+# parseado y la factura con los datos comunes (crear_factura) y agrega lo
+# propio de su tipo.
+constructores_tipo: dict = {}
+
+
+def registrar_tipo(*tipos: str):
+    def decorador(constructor):
+        for tipo in tipos:
+            constructores_tipo[tipo] = constructor
+        return constructor
+
+    return decorador
+
+
+def _fecha(valor: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(valor) if valor else None
+
+
+@registrar_tipo("I", "E", "T")
+def construir_comprobante(tree: ET.Element, factura: FacturaFiscal):
+    # Ingreso, egreso y traslado sólo usan los datos comunes
+    pass
+
+
+# Los crear_* reciben el diccionario de atributos del nodo (o el elemento,
+# que también tiene get) y regresan el objeto con los tipos ya convertidos.
+def crear_impuesto(tipo: str, attrib: dict) -> Impuesto:
+    return Impuesto(
+        tipo=tipo,
+        importe=float(attrib.get("Importe", 0.0)),
+        impuesto=int(attrib.get("Impuesto", "000")),
+        base=float(attrib.get("Base", 0.0)),
+        tasa_o_cuota=float(attrib.get("TasaOCuota", 0.0)),
+    )
+
+
+def crear_emisor(attrib: dict) -> Emisor:
+    return Emisor(
+        rfc=attrib.get("Rfc", ""),
+        nombre=attrib.get("Nombre", ""),
+        regimen_fiscal=attrib.get("RegimenFiscal", ""),
+        domicilio_fiscal=attrib.get("DomicilioFiscal", None),
+        codigo_postal=attrib.get("CodigoPostal", None),
+    )
+
+
+def crear_receptor(attrib: dict) -> Receptor:
+    return Receptor(
+        rfc=attrib.get("Rfc", ""),
+        nombre=attrib.get("Nombre", ""),
+        uso_cfdi=attrib.get("UsoCFDI", ""),
+        domicilio=attrib.get("Domicilio", None),
+        codigo_postal=attrib.get("CodigoPostal", None),
+    )
+
+
+def crear_concepto(attrib: dict, impuestos: List[Impuesto]) -> Concepto:
+    return Concepto(
+        clave_producto_servicio=attrib.get("ClaveProdServ", ""),
+        cantidad=float(attrib.get("Cantidad", 0)),
+        clave_unidad=attrib.get("ClaveUnidad", ""),
+        descripcion=attrib.get("Descripcion", ""),
+        valor_unitario=float(attrib.get("ValorUnitario", 0)),
+        importe=float(attrib.get("Importe", 0)),
+        impuestos=impuestos,
+    )
+
+
+def crear_pago(attrib: dict) -> Pago:
+    tipo_cambio = attrib.get("TipoCambioP")
+    return Pago(
+        fecha_pago=_fecha(attrib.get("FechaPago")),
+        forma_pago=attrib.get("FormaDePagoP", ""),
+        moneda=attrib.get("MonedaP", "MXN"),
+        tipo_cambio=float(tipo_cambio) if tipo_cambio else None,
+        monto=float(attrib.get("Monto", 0)),
+        documentos=[],
+    )
+
+
+def crear_docto_relacionado(attrib: dict) -> DoctoRelacionado:
+    return DoctoRelacionado(
+        id_documento=attrib.get("IdDocumento", ""),
+        serie=attrib.get("Serie"),
+        folio=attrib.get("Folio"),
+        moneda=attrib.get("MonedaDR", "MXN"),
+        equivalencia=float(attrib.get("EquivalenciaDR", 1)),
+        num_parcialidad=int(attrib.get("NumParcialidad", 0)),
+        saldo_anterior=float(attrib.get("ImpSaldoAnt", 0)),
+        importe_pagado=float(attrib.get("ImpPagado", 0)),
+        saldo_insoluto=float(attrib.get("ImpSaldoInsoluto", 0)),
+    )
+
+
+def crear_nomina(attrib: dict) -> Nomina:
+    return Nomina(
+        tipo_nomina=attrib.get("TipoNomina", ""),
+        fecha_pago=_fecha(attrib.get("FechaPago")),
+        fecha_inicial_pago=_fecha(attrib.get("FechaInicialPago")),
+        fecha_final_pago=_fecha(attrib.get("FechaFinalPago")),
+        num_dias_pagados=float(attrib.get("NumDiasPagados", 0)),
+        total_percepciones=float(attrib.get("TotalPercepciones", 0)),
+        total_deducciones=float(attrib.get("TotalDeducciones", 0)),
+        total_otros_pagos=float(attrib.get("TotalOtrosPagos", 0)),
+    )
+
+
+@registrar_tipo("P")
+def construir_pago(tree: ET.Element, factura: FacturaFiscal):
+    pagos_elem = tree.find(RUTA_PAGOS)
+
+    if pagos_elem is not None:
+        for pago_elem in pagos_elem.iterfind(TAG_PAGO):
+            pago = crear_pago(pago_elem.attrib)
+            for docto_elem in pago_elem.iterfind(TAG_DOCTO_RELACIONADO):
+                pago.documentos.append(crear_docto_relacionado(docto_elem.attrib))
+            factura.pagos.append(pago)
+
+
+@registrar_tipo("N")
+def construir_nomina(tree: ET.Element, factura: FacturaFiscal):
+    nomina_elem = tree.find(RUTA_NOMINA)
+
+    if nomina_elem is not None:
+        factura.nomina = crear_nomina(nomina_elem.attrib)
@@ -0,0 +1,200 @@
+import argparse
+import sys
+from pathlib import Path
+
+# Línea de comandos del pipeline: python -m cfdi ENTRADA [ENTRADA ...]
+# Cada entrada es un ZIP de XML o un directorio con XML sueltos. Los módulos
+# pesados (openpyxl, pyarrow, concurrent.futures) se importan hasta que se
+# necesitan, así --help y las corridas pequeñas arrancan rápido.
+
+FORMATOS = ("xlsx", "csv", "parquet")
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m cfdi",
+        description="Convierte CFDI (ZIP o directorios de XML) a una relación de facturas.",
+    )
+    parser.add_argument(
+        "entradas",
+        nargs="+",
+        type=Path,
+        help="Archivos ZIP o directorios con XML; los UUID repetidos entre entradas se omiten.",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="Procesos para parsear los ZIP en paralelo (sin --stream).",
+    )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        help="Procesa factura por factura sin cargar todo en memoria.",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        dest="formato",
+        choices=FORMATOS,
+        default="xlsx",
+        help="Formato de salida (default: xlsx).",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help="Libro de salida para xlsx (default: RelacionCFDI.xlsx) o directorio "
+        "para csv/parquet (default: directorio actual).",
+    )
+    parser.add_argument(
+        "--lote",
+        type=int,
+        default=500,
+        help="XML por lote enviado a cada proceso (default: 500).",
+    )
+    parser.add_argument(
+        "-p",
+        "--profile",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="JSON",
+        help="Muestra tiempos por etapa en stderr; con una ruta también los guarda en JSON.",
+    )
+    return parser
+
+
+def _validar_entradas(entradas: list) -> str:
+    for entrada in entradas:
+        if not entrada.exists():
+            return "No es una ruta valida {}".format(entrada)
+        if entrada.is_file() and entrada.suffix.lower() != ".zip":
+            return "La entrada {} no es un ZIP ni un directorio".format(entrada)
+    return None
+
+
+def _facturas_directorios(directorios: list, vistos, errores: list) -> list:
+    from . import tools
+
+    facturas = []
+    for directorio in directorios:
+        resultado = tools.convertir_facturas_directorio(directorio, errores=errores)
+        if isinstance(resultado, str):
+            raise ValueError(resultado)
+        facturas.extend(f for f in resultado if not f.uuid or vistos.agregar(f.uuid))
+    return facturas
+
+
+def _facturas(args, vistos, errores: list, metricas):
+    # Regresa un iterable de facturas ordenadas por fecha. En modo stream es
+    # un generador que mezcla los ZIP (orden externo) con los directorios.
+    from . import tools
+
+    zips = [e for e in args.entradas if e.is_file()]
+    directorios = [e for e in args.entradas if e.is_dir()]
+
+    # Los directorios primero: su índice ya trae las facturas parseadas
+    sueltas = _facturas_directorios(directorios, vistos, errores)
+
+    if args.stream:
+        if not zips:
+            return sueltas
+        from heapq import merge
+
+        return merge(
+            sueltas,
+            tools.iter_facturas_zip(
+                zips, ordenar=True, metricas=metricas, vistos=vistos
+            ),
+            key=lambda f: f.fecha,
+        )
+
+    if not zips:
+        return sueltas
+
+    facturas = tools.convertir_facturas_zip(
+        zips,
+        workers=args.workers,
+        lote=args.lote,
+        errores=errores,
+        metricas=metricas,
+        vistos=vistos,
+    )
+    if isinstance(facturas, str):
+        raise ValueError(facturas)
+    if sueltas:
+        facturas = sorted(facturas + sueltas, key=lambda f: f.fecha)
+    return facturas
+
+
+def _exportar(args, facturas, metricas):
+    if args.formato == "xlsx":
+        from .tools import exportar_facturas_excel
+
+        salida = args.output or Path("RelacionCFDI.xlsx")
+        return exportar_facturas_excel(
+            facturas, salida, streaming=args.stream, metricas=metricas
+        )
+
+    from .columnar import exportar_facturas_columnar
+
+    resultado = exportar_facturas_columnar(
+        facturas, args.output or Path("."), formato=args.formato
+    )
+    return resultado if isinstance(resultado, str) else None
+
+
+def _imprimir_reporte(reporte: dict):
+    for etapa, segundos in reporte["tiempos"].items():
+        print("{:<20} {:>10.3f} s".format(etapa, segundos), file=sys.stderr)
+    for nombre, valor in reporte["contadores"].items():
+        print("{:<20} {:>10}".format(nombre, valor), file=sys.stderr)
+    print(
+        "{:<20} {:>10.1f}".format("documentos/s", reporte["documentos_por_segundo"]),
+        file=sys.stderr,
+    )
+
+
+def main(argv: list = None) -> int:
+    args = crear_parser().parse_args(argv)
+
+    mensaje = _validar_entradas(args.entradas)
+    if mensaje:
+        print(mensaje, file=sys.stderr)
+        return 2
+
+    metricas = None
+    if args.profile is not None:
+        from .metricas import Metricas, hook_json
+
+        hooks = [_imprimir_reporte]
+        if args.profile != "-":
+            hooks.append(hook_json(args.profile))
+        metricas = Metricas(hooks=hooks)
+
+    from .duplicados import RegistroUUID
+
+    errores: list = []
+    vistos = RegistroUUID()
+
+    try:
+        facturas = _facturas(args, vistos, errores, metricas)
+        mensaje = _exportar(args, facturas, metricas)
+    except ValueError as e:
+        mensaje = str(e)
+
+    for archivo, error in errores:
+        print("{}: {}".format(archivo, error), file=sys.stderr)
+
+    if metricas is not None:
+        metricas.contar("errores", len(errores))
+        metricas.emitir()
+
+    if mensaje:
+        print(mensaje, file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,234 @@
+from pathlib import Path
+from typing import Union, Iterable
+from .cfdi import FacturaFiscal
+
+# Columnas de las tres tablas normalizadas; se relacionan por uuid y, para
+# los impuestos de un concepto, por el número de concepto dentro de la factura
+# (concepto = -1 para los impuestos del comprobante).
+COLUMNAS_FACTURAS = [
+    "uuid",
+    "fecha",
+    "serie",
+    "folio",
+    "tipo_comprobante",
+    "moneda",
+    "tipo_cambio",
+    "subtotal",
+    "total",
+    "emisor_rfc",
+    "emisor_nombre",
+    "receptor_rfc",
+    "receptor_nombre",
+    "uso_cfdi",
+]
+
+COLUMNAS_CONCEPTOS = [
+    "uuid",
+    "concepto",
+    "clave_producto_servicio",
+    "cantidad",
+    "clave_unidad",
+    "descripcion",
+    "valor_unitario",
+    "importe",
+]
+
+COLUMNAS_IMPUESTOS = [
+    "uuid",
+    "concepto",
+    "tipo",
+    "impuesto",
+    "base",
+    "tasa_o_cuota",
+    "importe",
+]
+
+FORMATOS = ("csv", "parquet")
+
+
+def _filas_factura(factura: FacturaFiscal) -> tuple:
+    emisor = factura.emisor
+    receptor = factura.receptor
+
+    fila_factura = (
+        factura.uuid,
+        factura.fecha,
+        factura.serie,
+        factura.folio,
+        factura.tipo_comprobante,
+        factura.moneda,
+        factura.tipo_cambio,
+        factura.subtotal,
+        factura.total,
+        emisor.rfc if emisor else None,
+        emisor.nombre if emisor else None,
+        receptor.rfc if receptor else None,
+        receptor.nombre if receptor else None,
+        receptor.uso_cfdi if receptor else None,
+    )
+
+    filas_conceptos = []
+    filas_impuestos = [
+        (factura.uuid, -1, i.tipo, i.impuesto, i.base, i.tasa_o_cuota, i.importe)
+        for i in factura.impuestos
+    ]
+
+    for n, concepto in enumerate(factura.conceptos):
+        filas_conceptos.append(
+            (
+                factura.uuid,
+                n,
+                concepto.clave_producto_servicio,
+                concepto.cantidad,
+                concepto.clave_unidad,
+                concepto.descripcion,
+                concepto.valor_unitario,
+                concepto.importe,
+            )
+        )
+        for i in concepto.impuestos:
+            filas_impuestos.append(
+                (factura.uuid, n, i.tipo, i.impuesto, i.base, i.tasa_o_cuota, i.importe)
+            )
+
+    return fila_factura, filas_conceptos, filas_impuestos
+
+
+class _EscritorCSV:
+    def __init__(self, ruta: Path, columnas: list):
+        import csv
+
+        self.archivo = open(ruta, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.archivo)
+        self.writer.writerow(columnas)
+
+    def escribir(self, filas: list):
+        self.writer.writerows(filas)
+
+    def close(self):
+        self.archivo.close()
+
+
+class _EscritorParquet:
+    def __init__(self, ruta: Path, schema):
+        import pyarrow.parquet as pq
+
+        self.schema = schema
+        self.writer = pq.ParquetWriter(str(ruta), schema)
+
+    def escribir(self, filas: list):
+        import pyarrow as pa
+
+        # Las filas se transponen a columnas; cada lote es un row group
+        columnas = list(zip(*filas))
+        tabla = pa.Table.from_arrays(
+            [pa.array(c, type=f.type) for c, f in zip(columnas, self.schema)],
+            schema=self.schema,
+        )
+        self.writer.write_table(tabla)
+
+    def close(self):
+        self.writer.close()
+
+
+def _schemas_parquet() -> tuple:
+    import pyarrow as pa
+
+    facturas = pa.schema(
+        [
+            ("uuid", pa.string()),
+            ("fecha", pa.timestamp("s")),
+            ("serie", pa.string()),
+            ("folio", pa.string()),
+            ("tipo_comprobante", pa.string()),
+            ("moneda", pa.string()),
+            ("tipo_cambio", pa.float64()),
+            ("subtotal", pa.float64()),
+            ("total", pa.float64()),
+            ("emisor_rfc", pa.string()),
+            ("emisor_nombre", pa.string()),
+            ("receptor_rfc", pa.string()),
+            ("receptor_nombre", pa.string()),
+            ("uso_cfdi", pa.string()),
+        ]
+    )
+    conceptos = pa.schema(
+        [
+            ("uuid", pa.string()),
+            ("concepto", pa.int32()),
+            ("clave_producto_servicio", pa.string()),
+            ("cantidad", pa.float64()),
+            ("clave_unidad", pa.string()),
+            ("descripcion", pa.string()),
+            ("valor_unitario", pa.float64()),
+            ("importe", pa.float64()),
+        ]
+    )
+    impuestos = pa.schema(
+        [
+            ("uuid", pa.string()),
+            ("concepto", pa.int32()),
+            ("tipo", pa.string()),
+            ("impuesto", pa.int16()),
+            ("base", pa.float64()),
+            ("tasa_o_cuota", pa.float64()),
+            ("importe", pa.float64()),
+        ]
+    )
+    return facturas, conceptos, impuestos
+
+
+def exportar_facturas_columnar(
+    facturas: Iterable[FacturaFiscal],
+    directorio: Union[str, Path] = ".",
+    formato: str = "csv",
+    tamano_lote: int = 50000,
+) -> Union[list[Path], str]:
+    # Escribe facturas, conceptos e impuestos como tres tablas relacionadas
+    # por uuid (facturas.csv, conceptos.csv, impuestos.csv o .parquet).
+    # Las facturas se recorren una sola vez y las filas se escriben en lotes
+    # de tamano_lote; en parquet cada lote es un row group.
+
+    if formato not in FORMATOS:
+        return "Formato no soportado {}, use {}".format(formato, ", ".join(FORMATOS))
+
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    rutas = [
+        directorio / "{}.{}".format(nombre, formato)
+        for nombre in ("facturas", "conceptos", "impuestos")
+    ]
+
+    if formato == "parquet":
+        try:
+            schemas = _schemas_parquet()
+        except ImportError:
+            return "Se requiere pyarrow para exportar en formato parquet."
+        escritores = [_EscritorParquet(r, s) for r, s in zip(rutas, schemas)]
+    else:
+        columnas = (COLUMNAS_FACTURAS, COLUMNAS_CONCEPTOS, COLUMNAS_IMPUESTOS)
+        escritores = [_EscritorCSV(r, c) for r, c in zip(rutas, columnas)]
+
+    lotes = ([], [], [])
+
+    def vaciar(forzar: bool = False):
+        for escritor, lote in zip(escritores, lotes):
+            if lote and (forzar or len(lote) >= tamano_lote):
+                escritor.escribir(lote)
+                lote.clear()
+
+    try:
+        for factura in facturas:
+            fila_factura, filas_conceptos, filas_impuestos = _filas_factura(factura)
+            lotes[0].append(fila_factura)
+            lotes[1].extend(filas_conceptos)
+            lotes[2].extend(filas_impuestos)
+            vaciar()
+
+        vaciar(forzar=True)
+    finally:
+        for escritor in escritores:
+            escritor.close()
+
+    return rutas
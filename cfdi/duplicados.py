@@ -0,0 +1,178 @@
+import math
+import re
+import sqlite3
+from hashlib import blake2b
+from pathlib import Path
+from typing import Union
+
+_ATRIBUTO_UUID = re.compile(rb"""\sUUID\s*=\s*["']([^"']+)["']""")
+_ETIQUETA_TIMBRE = b"TimbreFiscalDigital"
+
+
+def extraer_uuid(contenido: Union[str, bytes]) -> str:
+    # Pre-escaneo barato del UUID del timbre sin parsear el XML. El timbre
+    # va en el Complemento, casi al final del documento, así que se busca
+    # desde el final con rfind. Regresa None si no hay timbre.
+    if isinstance(contenido, str):
+        contenido = contenido.encode("utf-8")
+
+    fin = len(contenido)
+    while True:
+        pos = contenido.rfind(_ETIQUETA_TIMBRE, 0, fin)
+        if pos < 0:
+            return None
+        fin = pos
+
+        # Tiene que ser la etiqueta de apertura (<tfd:TimbreFiscalDigital ...),
+        # no el cierre ni el namespace o schemaLocation de otro elemento
+        inicio = contenido.rfind(b"<", 0, pos)
+        prefijo = contenido[inicio + 1 : pos]
+        if inicio < 0 or (prefijo and not re.fullmatch(rb"[\w.-]+:", prefijo)):
+            continue
+
+        cierre = contenido.find(b">", pos)
+        if cierre < 0:
+            cierre = len(contenido)
+        encontrado = _ATRIBUTO_UUID.search(contenido, pos, cierre)
+        if encontrado:
+            return encontrado.group(1).decode("ascii", "replace").upper()
+
+
+class RegistroUUID:
+    """UUIDs ya ingeridos para descartar CFDI duplicados entre archivos.
+
+    Sin ruta ni bloom se usa un set en memoria con el UUID en 16 bytes.
+    Con bloom=True sólo se usa un filtro de Bloom de tamaño fijo
+    (capacidad, error): la memoria no crece, pero con probabilidad error un
+    documento nuevo se toma como duplicado. Con ruta los UUID se guardan en
+    SQLite (persisten entre corridas) y el filtro de Bloom evita consultar
+    la base para los documentos nuevos; el resultado es exacto.
+    """
+
+    COMMIT_CADA = 1000
+
+    def __init__(
+        self,
+        ruta: Union[str, Path] = None,
+        bloom: bool = False,
+        capacidad: int = 1_000_000,
+        error: float = 0.001,
+    ):
+        self.duplicados = 0
+        self._total = 0
+        self._set = None
+        self._bits = None
+        self.cxn = None
+        self._pendientes = 0
+
+        if ruta is None and not bloom:
+            self._set = set()
+            return
+
+        # Tamaño óptimo del filtro: m = -n ln(p) / ln(2)^2, k = m/n ln(2)
+        self._m = max(8, int(-capacidad * math.log(error) / math.log(2) ** 2))
+        self._k = max(1, round(self._m / capacidad * math.log(2)))
+        self._bits = bytearray((self._m + 7) // 8)
+
+        if ruta is not None:
+            self.cxn = sqlite3.connect(str(ruta))
+            self.cxn.execute(
+                "CREATE TABLE IF NOT EXISTS uuids (uuid BLOB PRIMARY KEY) WITHOUT ROWID"
+            )
+            for (clave,) in self.cxn.execute("SELECT uuid FROM uuids"):
+                self._marcar(clave)
+                self._total += 1
+
+    def __enter__(self) -> "RegistroUUID":
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __contains__(self, uuid: str) -> bool:
+        clave = self._clave(uuid)
+        if self._set is not None:
+            return clave in self._set
+        if not self._probar(clave):
+            return False
+        if self.cxn is None:
+            return True
+        return self._en_base(clave)
+
+    @staticmethod
+    def _clave(uuid: str) -> bytes:
+        try:
+            clave = bytes.fromhex(uuid.replace("-", ""))
+            if len(clave) == 16:
+                return clave
+        except ValueError:
+            pass
+        return uuid.upper().encode("utf-8")
+
+    def _posiciones(self, clave: bytes):
+        # Doble hashing: k posiciones a partir de dos valores de 64 bits
+        digest = blake2b(clave, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self._k):
+            yield (h1 + i * h2) % self._m
+
+    def _marcar(self, clave: bytes):
+        bits = self._bits
+        for p in self._posiciones(clave):
+            bits[p >> 3] |= 1 << (p & 7)
+
+    def _probar(self, clave: bytes) -> bool:
+        bits = self._bits
+        for p in self._posiciones(clave):
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def _en_base(self, clave: bytes) -> bool:
+        row = self.cxn.execute("SELECT 1 FROM uuids WHERE uuid = ?", (clave,)).fetchone()
+        return row is not None
+
+    def duplicado(self, uuid: str) -> bool:
+        # True (y lo cuenta en duplicados) si el UUID ya se registró; no lo
+        # registra. Para registrar el UUID hasta que el documento se procesó
+        # bien: duplicado() antes de parsearlo y agregar() después.
+        if uuid in self:
+            self.duplicados += 1
+            return True
+        return False
+
+    def agregar(self, uuid: str) -> bool:
+        # Registra el UUID; regresa False si ya estaba (es un duplicado)
+        clave = self._clave(uuid)
+
+        if self._set is not None:
+            if clave in self._set:
+                self.duplicados += 1
+                return False
+            self._set.add(clave)
+            self._total += 1
+            return True
+
+        if self._probar(clave) and (self.cxn is None or self._en_base(clave)):
+            self.duplicados += 1
+            return False
+
+        self._marcar(clave)
+        self._total += 1
+        if self.cxn is not None:
+            self.cxn.execute("INSERT OR IGNORE INTO uuids VALUES (?)", (clave,))
+            self._pendientes += 1
+            if self._pendientes >= self.COMMIT_CADA:
+                self.cxn.commit()
+                self._pendientes = 0
+        return True
+
+    def cerrar(self):
+        if self.cxn is not None:
+            self.cxn.commit()
+            self.cxn.close()
+            self.cxn = None
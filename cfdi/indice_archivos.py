@@ -0,0 +1,134 @@
+import os
+import pickle
+import sqlite3
+from pathlib import Path
+from typing import Union, Iterator
+
+from .cfdi import FacturaFiscal
+
+
+class IndiceArchivos:
+    """Índice persistente (SQLite) de los XML de un directorio.
+
+    Por cada archivo guarda ruta, tamaño, mtime, UUID y la factura ya
+    parseada. sincronizar() sólo parsea los archivos nuevos o modificados
+    y elimina del índice los que ya no existen.
+    """
+
+    def __init__(self, ruta: Union[str, Path]):
+        self.ruta = str(ruta)
+        self.cxn = sqlite3.connect(self.ruta)
+        self.cxn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS archivos (
+                ruta TEXT PRIMARY KEY,
+                tamano INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                uuid TEXT,
+                objeto BLOB
+            )
+            """
+        )
+        self.cxn.commit()
+
+    def __enter__(self) -> "IndiceArchivos":
+        return self
+
+    def __exit__(self, *args):
+        self.cerrar()
+
+    @staticmethod
+    def _listar_xml(directorio: str) -> Iterator[os.DirEntry]:
+        # os.scandir regresa el stat ya leído en la mayoría de los sistemas
+        pendientes = [directorio]
+        while pendientes:
+            with os.scandir(pendientes.pop()) as entradas:
+                for entrada in entradas:
+                    if entrada.is_dir(follow_symlinks=False):
+                        pendientes.append(entrada.path)
+                    elif entrada.name.lower().endswith(".xml"):
+                        yield entrada
+
+    def sincronizar(
+        self, directorio: Union[str, Path], errores: list = None, cambios: dict = None
+    ) -> list[FacturaFiscal]:
+        # Regresa las facturas de los archivos nuevos o modificados desde la
+        # última sincronización. Los XML que no se pueden parsear se agregan
+        # a errores como (ruta, mensaje), se quitan del índice (si estaban) y
+        # se vuelven a intentar la próxima vez.
+        # cambios: si se envía, se llena con ruta -> (UUID anterior, factura)
+        # de cada archivo nuevo, modificado, con error o eliminado. El UUID
+        # anterior es el que tenía el índice (None si el archivo es nuevo) y
+        # factura es None si el archivo ya no existe, no se pudo parsear o no
+        # es una factura.
+        if errores is None:
+            errores = []
+
+        conocidos = {
+            ruta: ((tamano, mtime), uuid)
+            for ruta, tamano, mtime, uuid in self.cxn.execute(
+                "SELECT ruta, tamano, mtime, uuid FROM archivos"
+            )
+        }
+
+        nuevas: list[FacturaFiscal] = []
+        registros = []
+        fallidos = []
+
+        for entrada in self._listar_xml(str(directorio)):
+            stat = entrada.stat()
+            firma = (stat.st_size, stat.st_mtime_ns)
+
+            firma_anterior, uuid_anterior = conocidos.pop(entrada.path, (None, None))
+            if firma_anterior == firma:
+                continue
+
+            try:
+                with open(entrada.path, "rb") as f:
+                    factura = FacturaFiscal.parse_from_xml(f.read())
+            except Exception as e:
+                errores.append((entrada.path, str(e)))
+                if firma_anterior is not None:
+                    # La factura del índice ya no corresponde al archivo
+                    fallidos.append((entrada.path,))
+                if cambios is not None:
+                    cambios[entrada.path] = (uuid_anterior, None)
+                continue
+
+            registros.append(
+                (
+                    entrada.path,
+                    firma[0],
+                    firma[1],
+                    factura.uuid if factura is not None else None,
+                    pickle.dumps(factura, protocol=pickle.HIGHEST_PROTOCOL),
+                )
+            )
+            if factura is not None:
+                nuevas.append(factura)
+            if cambios is not None:
+                cambios[entrada.path] = (uuid_anterior, factura)
+
+        with self.cxn:
+            self.cxn.executemany(
+                "INSERT OR REPLACE INTO archivos VALUES (?, ?, ?, ?, ?)", registros
+            )
+            # Lo que quedó en conocidos ya no existe en el directorio
+            self.cxn.executemany(
+                "DELETE FROM archivos WHERE ruta = ?",
+                [(r,) for r in conocidos] + fallidos,
+            )
+        if cambios is not None:
+            for ruta, (_, uuid) in conocidos.items():
+                cambios[ruta] = (uuid, None)
+
+        return nuevas
+
+    def facturas(self) -> Iterator[FacturaFiscal]:
+        for (objeto,) in self.cxn.execute(
+            "SELECT objeto FROM archivos WHERE uuid IS NOT NULL"
+        ):
+            yield pickle.loads(objeto)
+
+    def cerrar(self):
+        self.cxn.close()
@@ -0,0 +1,192 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Iterable, Iterator, Optional
+
+from .cfdi import FacturaFiscal
+
+
+def _fecha(factura: FacturaFiscal) -> datetime:
+    # Las facturas sin fecha quedan al inicio del orden
+    return factura.fecha or datetime.min
+
+
+def _rango_mes(anio: int, mes: int) -> tuple:
+    desde = datetime(anio, mes, 1)
+    hasta = datetime(anio + 1, 1, 1) if mes == 12 else datetime(anio, mes + 1, 1)
+    return desde, hasta
+
+
+class _PorFecha:
+    # Facturas ordenadas por fecha en dos listas paralelas; las consultas por
+    # rango son dos bisect sobre fechas.
+
+    __slots__ = ("fechas", "facturas", "ordenado")
+
+    def __init__(self):
+        self.fechas: list[datetime] = []
+        self.facturas: list[FacturaFiscal] = []
+        self.ordenado = True
+
+    def insertar(self, factura: FacturaFiscal):
+        fecha = _fecha(factura)
+        if not self.fechas or fecha >= self.fechas[-1]:
+            # Caso común: llegan en orden, se agrega al final
+            self.fechas.append(fecha)
+            self.facturas.append(factura)
+            return
+        i = bisect_right(self.fechas, fecha)
+        self.fechas.insert(i, fecha)
+        self.facturas.insert(i, factura)
+
+    def agregar_sin_orden(self, factura: FacturaFiscal):
+        # Para cargas por lote: se ordena una sola vez en ordenar()
+        self.fechas.append(_fecha(factura))
+        self.facturas.append(factura)
+        self.ordenado = False
+
+    def ordenar(self):
+        if self.ordenado:
+            return
+        # sort es estable: a igual fecha se respeta el orden de llegada
+        orden = sorted(range(len(self.fechas)), key=self.fechas.__getitem__)
+        self.fechas = [self.fechas[i] for i in orden]
+        self.facturas = [self.facturas[i] for i in orden]
+        self.ordenado = True
+
+    def rango(self, desde: datetime = None, hasta: datetime = None) -> list:
+        inicio = 0 if desde is None else bisect_left(self.fechas, desde)
+        fin = len(self.fechas) if hasta is None else bisect_left(self.fechas, hasta)
+        return self.facturas[inicio:fin]
+
+
+class IndiceFacturas:
+    """Índice en memoria sobre facturas ya parseadas.
+
+    Busca por UUID y por RFC de emisor o receptor con diccionarios; las
+    fechas de cada RFC (y las de todas las facturas) se guardan ordenadas,
+    así que las consultas por rango o por mes, solas o combinadas con el
+    RFC, son O(log n) más el número de resultados. Los rangos son
+    [desde, hasta). Se pueden seguir agregando facturas con agregar() o
+    agregar_lote() conforme llegan nuevos ZIP.
+    """
+
+    def __init__(self, facturas: Iterable[FacturaFiscal] = None):
+        self._uuid: dict[str, FacturaFiscal] = {}
+        self._emisor: dict[str, _PorFecha] = {}
+        self._receptor: dict[str, _PorFecha] = {}
+        self._todas = _PorFecha()
+
+        if facturas is not None:
+            self.agregar_lote(facturas)
+
+    def __len__(self) -> int:
+        return len(self._todas.fechas)
+
+    def __contains__(self, uuid: str) -> bool:
+        return bool(uuid) and uuid.upper() in self._uuid
+
+    def __iter__(self) -> Iterator[FacturaFiscal]:
+        return iter(self._todas.facturas)
+
+    def _registrar(self, factura: FacturaFiscal) -> bool:
+        # Regresa False si la factura ya estaba (mismo UUID)
+        if factura is None:
+            return False
+        if factura.uuid:
+            uuid = factura.uuid.upper()
+            if uuid in self._uuid:
+                return False
+            self._uuid[uuid] = factura
+        return True
+
+    def _rfcs(self, factura: FacturaFiscal):
+        emisor = factura.emisor.rfc if factura.emisor else None
+        receptor = factura.receptor.rfc if factura.receptor else None
+        return emisor, receptor
+
+    def agregar(self, factura: FacturaFiscal) -> bool:
+        # Inserta una factura conservando el orden; False si ya estaba
+        if not self._registrar(factura):
+            return False
+
+        emisor, receptor = self._rfcs(factura)
+        self._todas.insertar(factura)
+        if emisor:
+            self._emisor.setdefault(emisor, _PorFecha()).insertar(factura)
+        if receptor:
+            self._receptor.setdefault(receptor, _PorFecha()).insertar(factura)
+        return True
+
+    def agregar_lote(self, facturas: Iterable[FacturaFiscal]) -> int:
+        # Agrega muchas facturas y ordena cada lista una sola vez al final.
+        # Regresa cuántas se agregaron (se omiten los UUID repetidos).
+        tocados = [self._todas]
+        agregadas = 0
+
+        for factura in facturas:
+            if not self._registrar(factura):
+                continue
+            agregadas += 1
+
+            emisor, receptor = self._rfcs(factura)
+            self._todas.agregar_sin_orden(factura)
+            for rfc, por_rfc in ((emisor, self._emisor), (receptor, self._receptor)):
+                if not rfc:
+                    continue
+                lista = por_rfc.get(rfc)
+                if lista is None:
+                    lista = por_rfc[rfc] = _PorFecha()
+                if lista.ordenado:
+                    tocados.append(lista)
+                lista.agregar_sin_orden(factura)
+
+        for lista in tocados:
+            lista.ordenar()
+
+        return agregadas
+
+    def uuid(self, uuid: str) -> Optional[FacturaFiscal]:
+        return self._uuid.get(uuid.upper()) if uuid else None
+
+    def fechas(self, desde: datetime = None, hasta: datetime = None) -> list[FacturaFiscal]:
+        return self._todas.rango(desde, hasta)
+
+    def emisor(
+        self, rfc: str, desde: datetime = None, hasta: datetime = None
+    ) -> list[FacturaFiscal]:
+        lista = self._emisor.get(rfc)
+        return lista.rango(desde, hasta) if lista is not None else []
+
+    def receptor(
+        self, rfc: str, desde: datetime = None, hasta: datetime = None
+    ) -> list[FacturaFiscal]:
+        lista = self._receptor.get(rfc)
+        return lista.rango(desde, hasta) if lista is not None else []
+
+    def rfc(
+        self, rfc: str, desde: datetime = None, hasta: datetime = None
+    ) -> list[FacturaFiscal]:
+        # Facturas donde el RFC es emisor o receptor, ordenadas por fecha
+        emitidas = self.emisor(rfc, desde, hasta)
+        # Una factura donde el RFC es emisor y receptor sólo se regresa una vez
+        ids = {id(f) for f in emitidas}
+        recibidas = [f for f in self.receptor(rfc, desde, hasta) if id(f) not in ids]
+        if not recibidas:
+            return emitidas
+        if not emitidas:
+            return recibidas
+        return sorted(emitidas + recibidas, key=_fecha)
+
+    def mes(
+        self, anio: int, mes: int, rfc: str = None, rol: str = None
+    ) -> list[FacturaFiscal]:
+        # rol: "emisor", "receptor" o None (cualquiera de los dos); sin rfc
+        # regresa todas las facturas del mes
+        desde, hasta = _rango_mes(anio, mes)
+        if rfc is None:
+            return self.fechas(desde, hasta)
+        if rol == "emisor":
+            return self.emisor(rfc, desde, hasta)
+        if rol == "receptor":
+            return self.receptor(rfc, desde, hasta)
+        return self.rfc(rfc, desde, hasta)
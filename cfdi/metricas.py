@@ -0,0 +1,93 @@
+import heapq
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Union
+
+
+class Metricas:
+    """Contadores y tiempos por etapa del pipeline (ZIP, parseo, orden, Excel).
+
+    Se pasa como metricas= a las funciones de cfdi.tools y a
+    FacturaFiscal.parse_from_xml; si no se envía no se mide nada. emitir()
+    entrega el reporte a cada hook registrado (ver hook_logging, hook_json o
+    cualquier función que reciba el dict del reporte).
+    """
+
+    def __init__(self, hooks: list = None, lentos: int = 10):
+        self.hooks: list[Callable[[dict], None]] = list(hooks or [])
+        self.contadores: dict[str, int] = {}
+        self.tiempos: dict[str, float] = {}
+        self.max_lentos = lentos
+        # Min-heap con los documentos más lentos: (segundos, identificador)
+        self._lentos: list[tuple] = []
+
+    def contar(self, nombre: str, cantidad: int = 1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def tiempo(self, etapa: str, segundos: float):
+        self.tiempos[etapa] = self.tiempos.get(etapa, 0.0) + segundos
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        inicio = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.tiempo(nombre, time.perf_counter() - inicio)
+
+    def documento(self, identificador: str, segundos: float):
+        self.contar("documentos_parseados")
+        registro = (segundos, identificador)
+        if len(self._lentos) < self.max_lentos:
+            heapq.heappush(self._lentos, registro)
+        elif registro > self._lentos[0]:
+            heapq.heapreplace(self._lentos, registro)
+
+    def reporte(self) -> dict:
+        documentos = self.contadores.get("documentos_parseados", 0)
+        # En modo paralelo sólo se conoce el tiempo total del pool
+        tiempo_parse = self.tiempos.get("parse") or self.tiempos.get("parse_paralelo", 0.0)
+        return {
+            "contadores": dict(self.contadores),
+            "tiempos": dict(self.tiempos),
+            "documentos_por_segundo": documentos / tiempo_parse if tiempo_parse else 0.0,
+            "documentos_lentos": [
+                {"documento": identificador, "segundos": segundos}
+                for segundos, identificador in sorted(self._lentos, reverse=True)
+            ],
+        }
+
+    def emitir(self) -> dict:
+        reporte = self.reporte()
+        for hook in self.hooks:
+            hook(reporte)
+        return reporte
+
+
+def hook_logging(logger=None, nivel: int = None) -> Callable[[dict], None]:
+    import logging
+
+    logger = logger or logging.getLogger("cfdi.metricas")
+    nivel = logging.INFO if nivel is None else nivel
+
+    def hook(reporte: dict):
+        for etapa, segundos in reporte["tiempos"].items():
+            logger.log(nivel, "etapa %s: %.3f s", etapa, segundos)
+        for nombre, valor in reporte["contadores"].items():
+            logger.log(nivel, "%s: %s", nombre, valor)
+        logger.log(
+            nivel, "documentos por segundo: %.1f", reporte["documentos_por_segundo"]
+        )
+
+    return hook
+
+
+def hook_json(ruta: Union[str, Path]) -> Callable[[dict], None]:
+    def hook(reporte: dict):
+        Path(ruta).write_text(
+            json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+
+    return hook
@@ -0,0 +1,178 @@
+from datetime import datetime
+from typing import Union, IO, Optional
+import xml.etree.ElementTree as ET
+
+from .cfdi import (
+    FacturaFiscal,
+    Concepto,
+    TAG_COMPROBANTE,
+    TAG_EMISOR,
+    TAG_RECEPTOR,
+    TAG_CONCEPTO,
+    TAG_IMPUESTOS,
+    TAG_TRASLADO,
+    TAG_RETENCION,
+    TAG_TIMBRE,
+    TAG_PAGO,
+    TAG_DOCTO_RELACIONADO,
+    TAG_NOMINA,
+    crear_impuesto,
+    crear_emisor,
+    crear_receptor,
+    crear_concepto,
+    crear_pago,
+    crear_docto_relacionado,
+    crear_nomina,
+    construir_comprobante,
+    construir_pago,
+    construir_nomina,
+)
+
+# Constructores de cfdi.cfdi que este parser reproduce sin construir el árbol
+TIPOS_STREAMING = {
+    "I": construir_comprobante,
+    "E": construir_comprobante,
+    "T": construir_comprobante,
+    "P": construir_pago,
+    "N": construir_nomina,
+}
+
+TAMANO_BLOQUE = 64 * 1024
+
+
+class _FacturaTarget:
+    # Target para ET.XMLParser: expat llama start/end conforme avanza por el
+    # documento, sin construir el árbol de elementos.
+
+    def __init__(self):
+        self.factura = FacturaFiscal()
+        # Sigue en None si no aparece cfdi:Comprobante con TipoDeComprobante
+        self.factura.tipo_comprobante = None
+        self.concepto: Concepto = None
+        # Lista a la que se agregan los impuestos encontrados; None fuera de
+        # un concepto o del nodo Impuestos del comprobante
+        self.destino: list = None
+        # Las retenciones se agregan después de los traslados, igual que en
+        # FacturaFiscal.obtener_impuestos_xml
+        self.retenciones = []
+        self.inicio = {
+            TAG_TRASLADO: self._traslado,
+            TAG_RETENCION: self._retencion,
+            TAG_CONCEPTO: self._concepto,
+            TAG_IMPUESTOS: self._impuestos,
+            TAG_EMISOR: self._emisor,
+            TAG_RECEPTOR: self._receptor,
+            TAG_TIMBRE: self._timbre,
+            TAG_COMPROBANTE: self._comprobante,
+            TAG_PAGO: self._pago,
+            TAG_DOCTO_RELACIONADO: self._docto_relacionado,
+            TAG_NOMINA: self._nomina,
+        }
+
+    def start(self, tag: str, attrib: dict):
+        accion = self.inicio.get(tag)
+        if accion is not None:
+            accion(attrib)
+
+    def end(self, tag: str):
+        if tag == TAG_CONCEPTO:
+            concepto = self.concepto
+            concepto.impuestos.extend(self.retenciones)
+            self.retenciones.clear()
+            self.factura.conceptos.append(concepto)
+            self.concepto = None
+            self.destino = None
+        elif tag == TAG_IMPUESTOS and self.concepto is None:
+            # Cierre del nodo Impuestos del comprobante
+            self.factura.impuestos.extend(self.retenciones)
+            self.retenciones.clear()
+            self.destino = None
+
+    def close(self) -> Optional[FacturaFiscal]:
+        # Sin tipo no es un CFDI; el parser de árbol también regresa None
+        if self.factura.tipo_comprobante is None:
+            return None
+        return self.factura
+
+    def _traslado(self, attrib: dict):
+        if self.destino is not None:
+            self.destino.append(crear_impuesto("traslado", attrib))
+
+    def _retencion(self, attrib: dict):
+        if self.destino is not None:
+            self.retenciones.append(crear_impuesto("retencion", attrib))
+
+    def _concepto(self, attrib: dict):
+        self.concepto = crear_concepto(attrib, [])
+        self.destino = self.concepto.impuestos
+
+    def _impuestos(self, attrib: dict):
+        # Fuera de un concepto sólo está el nodo Impuestos del comprobante
+        if self.concepto is None:
+            self.destino = self.factura.impuestos
+
+    def _emisor(self, attrib: dict):
+        self.factura.emisor = crear_emisor(attrib)
+
+    def _receptor(self, attrib: dict):
+        self.factura.receptor = crear_receptor(attrib)
+
+    def _timbre(self, attrib: dict):
+        self.factura.uuid = attrib.get("UUID", "")
+        self.factura.sello = attrib.get("SelloCFD", "")
+
+    def _comprobante(self, attrib: dict):
+        factura = self.factura
+        fecha = attrib.get("Fecha")
+        tipo_cambio = attrib.get("TipoCambio")
+        descuento = attrib.get("Descuento")
+        factura.version = attrib.get("Version", "4.0")
+        factura.serie = attrib.get("Serie")
+        factura.folio = attrib.get("Folio")
+        factura.fecha = datetime.fromisoformat(fecha) if fecha else datetime.now()
+        factura.forma_pago = attrib.get("FormaPago", "")
+        factura.metodo_pago = attrib.get("MetodoPago", "")
+        factura.lugar_expedicion = attrib.get("LugarExpedicion", "")
+        factura.moneda = attrib.get("Moneda", "MXN")
+        factura.tipo_cambio = float(tipo_cambio) if tipo_cambio else None
+        factura.subtotal = float(attrib.get("SubTotal", 0))
+        factura.descuento = float(descuento) if descuento else None
+        factura.total = float(attrib.get("Total", 0))
+        factura.tipo_comprobante = attrib.get("TipoDeComprobante")
+
+    def _pago(self, attrib: dict):
+        self.factura.pagos.append(crear_pago(attrib))
+
+    def _docto_relacionado(self, attrib: dict):
+        if self.factura.pagos:
+            self.factura.pagos[-1].documentos.append(crear_docto_relacionado(attrib))
+
+    def _nomina(self, attrib: dict):
+        self.factura.nomina = crear_nomina(attrib)
+
+
+def parse_factura_stream(
+    xml: Union[str, bytes, IO[bytes]], tamano_bloque: int = TAMANO_BLOQUE
+) -> Optional[FacturaFiscal]:
+    """Construye la FacturaFiscal en una sola pasada sobre el XML.
+
+    Acepta el XML como texto, bytes o un archivo abierto en modo binario.
+    Lo único que se evita es el árbol de elementos: los Concepto e Impuesto
+    se construyen igual y quedan en la factura, así que la memoria sigue
+    creciendo con el número de conceptos, sólo que sin el árbol encima
+    (benchmarks/bench_parser.py: pico de 31 MB contra 64 MB con 20000
+    conceptos). No es más rápido: en el mismo benchmark tarda 1.18 veces lo
+    que el parser de árbol.
+    Regresa None si el XML no tiene cfdi:Comprobante con TipoDeComprobante.
+    """
+    parser = ET.XMLParser(target=_FacturaTarget())
+
+    if isinstance(xml, (str, bytes)):
+        parser.feed(xml)
+    else:
+        bloque = xml.read(tamano_bloque)
+        while bloque:
+            parser.feed(bloque)
+            bloque = xml.read(tamano_bloque)
+
+    return parser.close()
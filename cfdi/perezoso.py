@@ -0,0 +1,163 @@
+from datetime import datetime
+from typing import Callable
+
+from . import xml_backend
+from .cfdi import (
+    FacturaFiscal,
+    TAG_EMISOR,
+    TAG_RECEPTOR,
+    TAG_IMPUESTOS,
+    TAG_CONCEPTOS,
+    TAG_CONCEPTO,
+    RUTA_TIMBRE,
+    crear_emisor,
+    crear_receptor,
+    crear_concepto,
+)
+
+# Modo perezoso (FacturaFiscal.parse_from_xml(..., perezoso=True)): la factura
+# guarda los valores del XML tal cual y convierte cada campo (float,
+# datetime, Emisor...) la primera vez que se lee. El valor convertido se
+# guarda en el mismo slot de la clase base, así que las siguientes lecturas
+# cuestan lo mismo que en una factura normal.
+# Los conceptos y los impuestos ni siquiera se recorren al construirla: se
+# guarda el XML original (el mismo objeto que xml_string) y se vuelve a
+# parsear la primera vez que se leen conceptos o impuestos. Conviene cuando
+# la mayoría de las facturas sólo se filtran por UUID, RFC, fecha o total;
+# si se van a leer los conceptos de casi todas, es más lento que el modo
+# normal porque cada XML se parsea dos veces.
+# Nunca se guardan elementos del árbol (con lxml un elemento mantiene vivo
+# todo el documento).
+
+# Atributos del comprobante que se convierten hasta que se leen
+LLAVES_FACTURA = ("Fecha", "TipoCambio", "SubTotal", "Descuento", "Total")
+
+
+def _atributos(elemento) -> dict:
+    # Copia de los atributos (emisor y receptor); con lxml attrib es un
+    # proxy que mantiene vivo todo el documento
+    attrib = elemento.attrib
+    return attrib if type(attrib) is dict else dict(attrib)
+
+
+def _perezoso(clase: type, nombre: str, convertir: Callable) -> property:
+    # Property que lee el slot nombre de clase y, si todavía no tiene valor,
+    # lo calcula con convertir(self) y lo guarda
+    slot = clase.__dict__[nombre]
+
+    def obtener(self):
+        try:
+            return slot.__get__(self, clase)
+        except AttributeError:
+            valor = convertir(self)
+            slot.__set__(self, valor)
+            return valor
+
+    return property(obtener, slot.__set__)
+
+
+def _float(valor, defecto=0.0):
+    return float(valor) if valor else defecto
+
+
+class FacturaFiscalPerezosa(FacturaFiscal):
+    """FacturaFiscal que convierte sus campos hasta que se leen.
+
+    Se construye desde el elemento raíz y el XML de donde salió; los textos
+    (UUID, serie, folio, claves) se copian de inmediato, los campos
+    numéricos, fechas, emisor y receptor se convierten en el primer acceso,
+    y los conceptos e impuestos se leen del XML (parseándolo otra vez) la
+    primera vez que se pide cualquiera de los dos.
+    """
+
+    __slots__ = ("_valores", "_attrib_emisor", "_attrib_receptor", "_xml")
+
+    def __init__(self, tree, xml):
+        attrib = tree.attrib
+        get = tree.get
+        self._valores = tuple([get(llave) for llave in LLAVES_FACTURA])
+        self._xml = xml
+
+        timbrefiscal = tree.find(RUTA_TIMBRE)
+        self.uuid = timbrefiscal.get("UUID", "") if timbrefiscal is not None else ""
+        self.sello = timbrefiscal.get("SelloCFD", "") if timbrefiscal is not None else ""
+
+        self.version = attrib.get("Version", "4.0")
+        self.serie = attrib.get("Serie")
+        self.folio = attrib.get("Folio")
+        self.forma_pago = attrib.get("FormaPago", "")
+        self.metodo_pago = attrib.get("MetodoPago", "")
+        self.lugar_expedicion = attrib.get("LugarExpedicion", "")
+        self.moneda = attrib.get("Moneda", "MXN")
+        self.tipo_comprobante = attrib.get("TipoDeComprobante", "I")
+        self.complementos = []
+        self.xml_string = None
+        self.pagos = []
+        self.nomina = None
+
+        emisor = tree.find(TAG_EMISOR)
+        receptor = tree.find(TAG_RECEPTOR)
+        self._attrib_emisor = _atributos(emisor) if emisor is not None else None
+        self._attrib_receptor = _atributos(receptor) if receptor is not None else None
+
+    def _leer_xml(self, nombre: str):
+        # Convierte conceptos e impuestos juntos (igual que
+        # FacturaFiscal.crear_factura), deja en su slot el que no se pidió si
+        # sigue pendiente y regresa el pedido
+        tree = xml_backend.fromstring(self._xml)
+        self._xml = None
+
+        impuestos_tree = tree.find(TAG_IMPUESTOS)
+        valores = {
+            "impuestos": FacturaFiscal.obtener_impuestos_xml(impuestos_tree)
+            if impuestos_tree is not None
+            else [],
+            "conceptos": [],
+        }
+        conceptos_elem = tree.find(TAG_CONCEPTOS)
+        if conceptos_elem is not None:
+            valores["conceptos"] = [
+                crear_concepto(c, FacturaFiscal.obtener_impuestos_xml(c))
+                for c in conceptos_elem.iterfind(TAG_CONCEPTO)
+            ]
+
+        otro = "impuestos" if nombre == "conceptos" else "conceptos"
+        slot = FacturaFiscal.__dict__[otro]
+        try:
+            slot.__get__(self, FacturaFiscal)
+        except AttributeError:
+            slot.__set__(self, valores[otro])
+        return valores[nombre]
+
+    def compactar(self) -> "FacturaFiscal":
+        # Se convierten antes de descartar el XML
+        self.conceptos
+        return super().compactar()
+
+    fecha = _perezoso(
+        FacturaFiscal,
+        "fecha",
+        lambda f: datetime.fromisoformat(f._valores[0]) if f._valores[0] else datetime.now(),
+    )
+    tipo_cambio = _perezoso(
+        FacturaFiscal, "tipo_cambio", lambda f: _float(f._valores[1], None)
+    )
+    subtotal = _perezoso(FacturaFiscal, "subtotal", lambda f: _float(f._valores[2]))
+    descuento = _perezoso(
+        FacturaFiscal, "descuento", lambda f: _float(f._valores[3], None)
+    )
+    total = _perezoso(FacturaFiscal, "total", lambda f: _float(f._valores[4]))
+    emisor = _perezoso(
+        FacturaFiscal,
+        "emisor",
+        lambda f: crear_emisor(f._attrib_emisor) if f._attrib_emisor is not None else None,
+    )
+    receptor = _perezoso(
+        FacturaFiscal,
+        "receptor",
+        lambda f: crear_receptor(f._attrib_receptor)
+        if f._attrib_receptor is not None
+        else None,
+    )
+    impuestos = _perezoso(FacturaFiscal, "impuestos", lambda f: f._leer_xml("impuestos"))
+    conceptos = _perezoso(FacturaFiscal, "conceptos", lambda f: f._leer_xml("conceptos"))
@@ -0,0 +1,197 @@
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+from .cfdi import FacturaFiscal
+
+TIPOS_IMPUESTO = ["traslado", "retencion"]
+
+# Dimensiones por las que se puede agrupar
+AGRUPACIONES = ("mes", "emisor", "receptor", "impuesto")
+
+
+@dataclass
+class ArreglosFacturas:
+    """Facturas y sus impuestos del comprobante en arreglos de NumPy.
+
+    Los RFC se guardan como códigos enteros que indexan emisores/receptores
+    y el tipo de impuesto como entero (0 traslado, 1 retención).
+    """
+
+    fecha: np.ndarray  # datetime64[s], una por factura
+    emisor: np.ndarray  # int32, índice en emisores
+    receptor: np.ndarray  # int32, índice en receptores
+    subtotal: np.ndarray  # float64
+    total: np.ndarray  # float64
+    emisores: list
+    receptores: list
+    # Una fila por impuesto; factura es el índice en los arreglos anteriores
+    impuesto_factura: np.ndarray  # int32
+    impuesto_tipo: np.ndarray  # int8
+    impuesto_clave: np.ndarray  # int8 (1 ISR, 2 IVA, 3 IEPS)
+    impuesto_base: np.ndarray  # float64
+    impuesto_importe: np.ndarray  # float64
+
+    @staticmethod
+    def desde_facturas(facturas: Iterable[FacturaFiscal]) -> "ArreglosFacturas":
+        fechas = []
+        subtotales = []
+        totales = []
+        codigos_emisor = []
+        codigos_receptor = []
+        emisores = {}
+        receptores = {}
+
+        imp_factura = []
+        imp_tipo = []
+        imp_clave = []
+        imp_base = []
+        imp_importe = []
+
+        for n, factura in enumerate(facturas):
+            fechas.append(factura.fecha)
+            subtotales.append(factura.subtotal)
+            totales.append(factura.total)
+
+            rfc = factura.emisor.rfc if factura.emisor else ""
+            codigos_emisor.append(emisores.setdefault(rfc, len(emisores)))
+            rfc = factura.receptor.rfc if factura.receptor else ""
+            codigos_receptor.append(receptores.setdefault(rfc, len(receptores)))
+
+            for impuesto in factura.impuestos:
+                imp_factura.append(n)
+                imp_tipo.append(0 if impuesto.tipo == "traslado" else 1)
+                imp_clave.append(int(impuesto.impuesto))
+                imp_base.append(impuesto.base)
+                imp_importe.append(impuesto.importe)
+
+        return ArreglosFacturas(
+            fecha=np.array(fechas, dtype="datetime64[s]"),
+            emisor=np.array(codigos_emisor, dtype=np.int32),
+            receptor=np.array(codigos_receptor, dtype=np.int32),
+            subtotal=np.array(subtotales, dtype=np.float64),
+            total=np.array(totales, dtype=np.float64),
+            emisores=list(emisores),
+            receptores=list(receptores),
+            impuesto_factura=np.array(imp_factura, dtype=np.int32),
+            impuesto_tipo=np.array(imp_tipo, dtype=np.int8),
+            impuesto_clave=np.array(imp_clave, dtype=np.int8),
+            impuesto_base=np.array(imp_base, dtype=np.float64),
+            impuesto_importe=np.array(imp_importe, dtype=np.float64),
+        )
+
+
+def _codigos(arreglos: ArreglosFacturas, por: tuple, factura: np.ndarray) -> list:
+    # Códigos enteros de cada dimensión para las filas indicadas por factura
+    codigos = []
+    for dimension in por:
+        if dimension == "mes":
+            meses = arreglos.fecha[factura].astype("datetime64[M]")
+            codigos.append(meses.astype(np.int64))
+        elif dimension == "emisor":
+            codigos.append(arreglos.emisor[factura].astype(np.int64))
+        elif dimension == "receptor":
+            codigos.append(arreglos.receptor[factura].astype(np.int64))
+    return codigos
+
+
+def _tabla(arreglos: ArreglosFacturas, por: tuple, grupos: np.ndarray, sumas: dict):
+    # Arma el arreglo estructurado con las llaves de cada grupo y sus sumas
+    dtype = []
+    for dimension in por:
+        if dimension == "mes":
+            dtype.append(("mes", "datetime64[M]"))
+        elif dimension == "emisor":
+            dtype.append(("emisor", "U13"))
+        elif dimension == "receptor":
+            dtype.append(("receptor", "U13"))
+        elif dimension == "impuesto":
+            dtype.extend([("tipo", "U9"), ("impuesto", np.int8)])
+    dtype.extend((nombre, valores.dtype) for nombre, valores in sumas.items())
+
+    tabla = np.empty(len(grupos), dtype=dtype)
+    columna = 0
+    for dimension in por:
+        llaves = grupos[:, columna]
+        if dimension == "mes":
+            tabla["mes"] = llaves.astype("datetime64[M]")
+        elif dimension == "emisor":
+            tabla["emisor"] = np.array(arreglos.emisores, dtype="U13")[llaves]
+        elif dimension == "receptor":
+            tabla["receptor"] = np.array(arreglos.receptores, dtype="U13")[llaves]
+        elif dimension == "impuesto":
+            tabla["tipo"] = np.array(TIPOS_IMPUESTO)[llaves // 16]
+            tabla["impuesto"] = llaves % 16
+        columna += 1
+
+    for nombre, valores in sumas.items():
+        tabla[nombre] = valores
+
+    return tabla
+
+
+def _agrupar(codigos: list, filas: int) -> tuple:
+    if not codigos:
+        return np.zeros((1, 0), dtype=np.int64), np.zeros(filas, dtype=np.int64)
+    llaves = np.stack(codigos, axis=1)
+    grupos, inverso = np.unique(llaves, axis=0, return_inverse=True)
+    return grupos, inverso.reshape(-1)
+
+
+def resumen_facturas(
+    facturas, por: tuple = ("mes", "emisor")
+) -> np.ndarray:
+    """Suma subtotal y total y cuenta facturas por cada grupo.
+
+    facturas puede ser una colección de FacturaFiscal o ArreglosFacturas.
+    por acepta "mes", "emisor" y "receptor".
+    """
+    arreglos = (
+        facturas
+        if isinstance(facturas, ArreglosFacturas)
+        else ArreglosFacturas.desde_facturas(facturas)
+    )
+    por = tuple(d for d in por if d != "impuesto")
+    filas = np.arange(len(arreglos.fecha))
+
+    grupos, inverso = _agrupar(_codigos(arreglos, por, filas), len(filas))
+    n = len(grupos)
+
+    sumas = {
+        "subtotal": np.bincount(inverso, weights=arreglos.subtotal, minlength=n),
+        "total": np.bincount(inverso, weights=arreglos.total, minlength=n),
+        "facturas": np.bincount(inverso, minlength=n).astype(np.int64),
+    }
+    return _tabla(arreglos, por, grupos, sumas)
+
+
+def resumen_impuestos(
+    facturas, por: tuple = ("mes", "emisor", "impuesto")
+) -> np.ndarray:
+    """Suma base e importe de los impuestos del comprobante por grupo.
+
+    facturas puede ser una colección de FacturaFiscal o ArreglosFacturas.
+    por acepta "mes", "emisor", "receptor" e "impuesto" (tipo y clave).
+    """
+    arreglos = (
+        facturas
+        if isinstance(facturas, ArreglosFacturas)
+        else ArreglosFacturas.desde_facturas(facturas)
+    )
+    factura = arreglos.impuesto_factura
+
+    codigos = _codigos(arreglos, por, factura)
+    if "impuesto" in por:
+        clave = arreglos.impuesto_tipo.astype(np.int64) * 16 + arreglos.impuesto_clave
+        codigos.insert(por.index("impuesto"), clave)
+
+    grupos, inverso = _agrupar(codigos, len(factura))
+    n = len(grupos)
+
+    sumas = {
+        "base": np.bincount(inverso, weights=arreglos.impuesto_base, minlength=n),
+        "importe": np.bincount(inverso, weights=arreglos.impuesto_importe, minlength=n),
+        "registros": np.bincount(inverso, minlength=n).astype(np.int64),
+    }
+    return _tabla(arreglos, por, grupos, sumas)
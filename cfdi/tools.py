@@ -1,41 +1,738 @@
 from io import BytesIO
 from pathlib import Path
-from typing import Union
+from typing import Union, BinaryIO
 from .cfdi import FacturaFiscal, Concepto,Emisor,Receptor
 
+# Tipos de comprobante que se incluyen por defecto en la relación de facturas
+TIPOS_RELACION = ("I",)
 
-def convertir_facturas_zip(file: Union[str, Path, BytesIO] = None):
 
+def _incluir(factura: FacturaFiscal, tipos: tuple) -> bool:
+    return factura is not None and (tipos is None or factura.tipo_comprobante in tipos)
+
+
+def _espacio_cache(cache, perezoso: bool) -> str:
+    # Las facturas perezosas se guardan aparte de las ya convertidas
+    return "{}_perezosas".format(cache.espacio) if perezoso else cache.espacio
+
+
+def _parse_lote_zip(
+    origen: Union[str, list], nombres: list = None, perezoso: bool = False
+) -> tuple:
+    # Se ejecuta en un proceso del pool. Si origen es una ruta, el proceso abre
+    # el ZIP y lee los miembros indicados; si es una lista, ya trae los bytes
+    # (nombre, contenido) de cada XML. Regresa las tuplas (nombre, factura)
+    # de los XML parseados (factura es None si no es un ingreso) y los errores.
     from zipfile import ZipFile
 
+    resultados: list[tuple] = []
+    errores: list[tuple] = []
+
+    def parse(nombre: str, contenido: bytes):
+        try:
+            resultados.append(
+                (nombre, FacturaFiscal.parse_from_xml(contenido, perezoso=perezoso))
+            )
+        except Exception as e:
+            errores.append((nombre, str(e)))
+
+    if isinstance(origen, list):
+        for nombre, contenido in origen:
+            parse(nombre, contenido)
+    else:
+        with ZipFile(origen, "r") as zip_file:
+            for nombre in nombres:
+                parse(nombre, zip_file.read(nombre))
+
+    return resultados, errores
+
+
+def _convertir_facturas_zip_pool(
+    archivos: list,
+    workers: int,
+    lote: int,
+    errores: list,
+    cache=None,
+    compacto: bool = False,
+    tipos: tuple = TIPOS_RELACION,
+    vistos=None,
+    perezoso: bool = False,
+) -> list[FacturaFiscal]:
+    from zipfile import ZipFile
+    from concurrent.futures import ProcessPoolExecutor
+    from .duplicados import extraer_uuid
+
+    facturas: list[FacturaFiscal] = []
+    espacio = _espacio_cache(cache, perezoso) if cache is not None else None
+    # UUID enviados a los procesos en esta corrida, aún sin registrar en vistos
+    enviados = set()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = []
+        for file in archivos:
+            with ZipFile(file, "r") as zip_file:
+                nombres = [n for n in zip_file.namelist() if n.lower().endswith(".xml")]
+                lotes = [nombres[i : i + lote] for i in range(0, len(nombres), lote)]
+
+                for nombres_lote in lotes:
+                    contenidos = {}
+                    uuids = {}
+                    if cache is not None or vistos is not None:
+                        # El proceso principal lee cada XML, descarta los UUID
+                        # ya vistos y busca en cache; sólo se envían a los
+                        # procesos los que falta parsear. Los UUID se
+                        # registran en vistos hasta que el XML se parseó bien
+                        for n in nombres_lote:
+                            contenido = zip_file.read(n)
+                            if vistos is not None:
+                                uuid = extraer_uuid(contenido)
+                                if uuid is not None:
+                                    if uuid in enviados:
+                                        vistos.duplicados += 1
+                                        continue
+                                    if vistos.duplicado(uuid):
+                                        continue
+                                    uuids[n] = uuid
+                            if cache is not None:
+                                encontrado, factura = cache.obtener(contenido, espacio)
+                                if encontrado:
+                                    if n in uuids:
+                                        vistos.agregar(uuids[n])
+                                    if _incluir(factura, tipos):
+                                        facturas.append(
+                                            factura.compactar() if compacto else factura
+                                        )
+                                    continue
+                            contenidos[n] = contenido
+                            if n in uuids:
+                                enviados.add(uuids[n])
+                        if not contenidos:
+                            continue
+                        futuro = pool.submit(
+                            _parse_lote_zip, list(contenidos.items()), None, perezoso
+                        )
+                    elif isinstance(file, BytesIO):
+                        # El proceso no puede abrir un BytesIO; se envían los bytes
+                        contenido = [(n, zip_file.read(n)) for n in nombres_lote]
+                        futuro = pool.submit(_parse_lote_zip, contenido, None, perezoso)
+                    else:
+                        futuro = pool.submit(
+                            _parse_lote_zip, str(file), nombres_lote, perezoso
+                        )
+                    futuros.append((futuro, nombres_lote, contenidos, uuids))
+
+        # Se recogen en el orden de envío para que el resultado ordenado
+        # sea el mismo que en modo secuencial
+        for futuro, nombres_lote, contenidos, uuids in futuros:
+            try:
+                resultados, errores_lote = futuro.result()
+            except Exception as e:
+                # Falló el proceso completo; se registra cada archivo del lote
+                errores_lote = [(n, str(e)) for n in nombres_lote]
+                resultados = []
+
+            for nombre, factura in resultados:
+                if nombre in uuids:
+                    vistos.agregar(uuids[nombre])
+                if cache is not None:
+                    cache.guardar(contenidos[nombre], factura, espacio=espacio)
+                if _incluir(factura, tipos):
+                    # Al venir de otro proceso los emisores ya no son
+                    # compartidos; se compactan en este proceso
+                    facturas.append(factura.compactar() if compacto else factura)
+            errores.extend(errores_lote)
+
+    return facturas
+
+
+def convertir_facturas_zip(
+    file: Union[str, Path, BytesIO, list] = None,
+    workers: int = None,
+    lote: int = 500,
+    errores: list = None,
+    cache=None,
+    compacto: bool = False,
+    tipos: tuple = TIPOS_RELACION,
+    metricas=None,
+    vistos=None,
+    perezoso: bool = False,
+):
+    # file: ruta o BytesIO del ZIP, o una lista de ellos (p. ej. emitidos y
+    # recibidos); con varios archivos se descartan los CFDI repetidos.
+    # workers: número de procesos para parsear en paralelo; None parsea en
+    # el proceso actual. lote: número de XML que se envían a cada proceso.
+    # errores: si se envía una lista, en modo paralelo ahí se agregan las
+    # tuplas (archivo, mensaje) de los XML que no se pudieron parsear.
+    # cache: CacheFacturas (cfdi.cache) para no volver a parsear XML ya vistos.
+    # compacto: regresa las facturas compactadas (FacturaFiscal.compactar).
+    # tipos: TipoDeComprobante a incluir; None incluye todos (I, E, P, T, N).
+    # metricas: cfdi.metricas.Metricas para medir cada etapa.
+    # vistos: RegistroUUID (cfdi.duplicados) con los UUID ya ingeridos; los
+    # XML cuyo UUID ya está se descartan sin parsearlos. Con una lista de
+    # archivos y vistos=None se usa un registro en memoria.
+    # perezoso: las facturas convierten sus campos hasta que se leen (ver
+    # cfdi.perezoso); conviene cuando sólo se filtra por pocos campos.
+
     if file is None:
         return "Debe de enviar un archivo o ruta del archivo."
 
-    if not isinstance(file, BytesIO):
-        if not file.exists():
-            return "El archivo en la ruta {} no existe".format(file)
-        
-        file_read = open(str(file), "rb")
-        file = BytesIO(file_read.read())
-        file_read.close()
+    archivos = list(file) if isinstance(file, (list, tuple)) else [file]
+    if not archivos:
+        return "Debe de enviar un archivo o ruta del archivo."
 
-    facturas: list[FacturaFiscal] = []
+    for n, archivo in enumerate(archivos):
+        if not isinstance(archivo, BytesIO):
+            archivo = archivos[n] = Path(archivo)
+            if not archivo.exists():
+                return "El archivo en la ruta {} no existe".format(archivo)
+
+    if vistos is None and len(archivos) > 1:
+        from .duplicados import RegistroUUID
+
+        vistos = RegistroUUID()
+
+    if errores is None:
+        errores = []
+
+    if workers is not None and workers > 1:
+        if metricas is None:
+            facturas = _convertir_facturas_zip_pool(
+                archivos, workers, lote, errores, cache, compacto, tipos, vistos, perezoso
+            )
+            return sorted([f for f in facturas if f.fecha], key=lambda x : x.fecha)
+
+        # En paralelo no se puede separar lectura y parseo por documento; se
+        # mide el tiempo total del pool
+        with metricas.etapa("parse_paralelo"):
+            facturas = _convertir_facturas_zip_pool(
+                archivos, workers, lote, errores, cache, compacto, tipos, vistos, perezoso
+            )
+        metricas.contar("documentos_parseados", len(facturas))
+        with metricas.etapa("ordenar"):
+            return sorted([f for f in facturas if f.fecha], key=lambda x : x.fecha)
+
+    facturas = [
+        f
+        for f in iter_facturas_zip(
+            archivos if len(archivos) > 1 else archivos[0],
+            cache=cache,
+            compacto=compacto,
+            tipos=tipos,
+            metricas=metricas,
+            vistos=vistos,
+            perezoso=perezoso,
+        )
+        if f.fecha
+    ]
+    if metricas is None:
+        facturas.sort(key=lambda x : x.fecha)
+    else:
+        with metricas.etapa("ordenar"):
+            facturas.sort(key=lambda x : x.fecha)
+
+    return facturas
+
+
+def _iter_run(ruta: str):
+    # Lee de regreso las facturas de un run ya ordenado en disco
+    import pickle
+
+    with open(ruta, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def _ordenar_por_fecha(facturas, tamano_run: int):
+    # Ordenamiento externo: se ordenan bloques de tamano_run facturas, se
+    # guardan en disco y al final se mezclan con heapq.merge. En memoria sólo
+    # queda un bloque mientras se generan los runs y una factura por run al
+    # mezclarlos.
+    import heapq
+    import pickle
+    import tempfile
+
+    with tempfile.TemporaryDirectory(prefix="cfdi_runs_") as directorio:
+        runs: list[str] = []
+        bloque: list[FacturaFiscal] = []
+
+        def guardar_run():
+            bloque.sort(key=lambda x: x.fecha)
+            ruta = str(Path(directorio) / "run_{}.pkl".format(len(runs)))
+            with open(ruta, "wb") as f:
+                for factura in bloque:
+                    pickle.dump(factura, f, protocol=pickle.HIGHEST_PROTOCOL)
+            runs.append(ruta)
+            bloque.clear()
+
+        for factura in facturas:
+            if not factura.fecha:
+                continue
+            bloque.append(factura)
+            if len(bloque) >= tamano_run:
+                guardar_run()
+
+        if not runs:
+            # Todo cupo en memoria, no hace falta mezclar
+            bloque.sort(key=lambda x: x.fecha)
+            yield from bloque
+            return
+
+        if bloque:
+            guardar_run()
+
+        yield from heapq.merge(*[_iter_run(r) for r in runs], key=lambda x: x.fecha)
+
+
+def iter_facturas_zip(
+    file: Union[str, Path, BytesIO, list],
+    ordenar: bool = False,
+    tamano_run: int = 10000,
+    cache=None,
+    compacto: bool = False,
+    tipos: tuple = TIPOS_RELACION,
+    metricas=None,
+    vistos=None,
+    perezoso: bool = False,
+):
+    # Generador que entrega las facturas del ZIP una por una, leyendo cada
+    # XML directamente del archivo en disco sin copiarlo a memoria. Con
+    # ordenar=True se entregan por fecha usando un ordenamiento externo en
+    # bloques de tamano_run facturas, así la memoria no depende del tamaño
+    # del ZIP. cache: CacheFacturas (cfdi.cache) para no volver a parsear
+    # XML ya vistos. compacto: entrega las facturas compactadas
+    # (FacturaFiscal.compactar). tipos: TipoDeComprobante a incluir; None
+    # incluye todos. metricas: cfdi.metricas.Metricas para medir lectura del
+    # ZIP (lectura_zip, bytes_leidos) y parseo (parse). file puede ser una
+    # lista de ZIP; vistos: RegistroUUID (cfdi.duplicados) para descartar
+    # los UUID repetidos sin parsearlos (con una lista y vistos=None se usa
+    # uno en memoria). perezoso: ver convertir_facturas_zip.
+    from zipfile import ZipFile
+    from time import perf_counter
+    from .duplicados import extraer_uuid
+
+    if ordenar:
+        # El ordenamiento externo se intercala con la lectura, así que su
+        # tiempo incluye el de las etapas anteriores
+        yield from _ordenar_por_fecha(
+            iter_facturas_zip(
+                file,
+                cache=cache,
+                compacto=compacto,
+                tipos=tipos,
+                metricas=metricas,
+                vistos=vistos,
+                perezoso=perezoso,
+            ),
+            tamano_run,
+        )
+        return
+
+    if isinstance(file, (list, tuple)):
+        if vistos is None:
+            from .duplicados import RegistroUUID
+
+            vistos = RegistroUUID()
+        for archivo in file:
+            yield from iter_facturas_zip(
+                archivo,
+                cache=cache,
+                compacto=compacto,
+                tipos=tipos,
+                metricas=metricas,
+                vistos=vistos,
+                perezoso=perezoso,
+            )
+        return
+
+    parse = FacturaFiscal.parse_from_xml
+    if metricas is not None or perezoso:
+        parse = lambda contenido: FacturaFiscal.parse_from_xml(
+            contenido, metricas=metricas, perezoso=perezoso
+        )
+
+    espacio = _espacio_cache(cache, perezoso) if cache is not None else None
+
+    if not isinstance(file, BytesIO):
+        file = str(file)
 
     with ZipFile(file, "r") as zip_file:
         for file_name in zip_file.namelist():
             if file_name.lower().endswith(".xml"):
+                if metricas is not None:
+                    inicio = perf_counter()
                 with zip_file.open(file_name) as xml_content:
-                    factura = FacturaFiscal.parse_from_xml(xml_content.read())
-                    if factura is not None:
-                        facturas.append(factura)
+                    contenido = xml_content.read()
+                if metricas is not None:
+                    metricas.tiempo("lectura_zip", perf_counter() - inicio)
+                    metricas.contar("bytes_leidos", len(contenido))
+
+                uuid = None
+                if vistos is not None:
+                    uuid = extraer_uuid(contenido)
+                    if uuid is not None and vistos.duplicado(uuid):
+                        if metricas is not None:
+                            metricas.contar("duplicados")
+                        continue
+
+                if cache is not None:
+                    factura = cache.obtener_o_parsear(contenido, parse, espacio)
+                else:
+                    factura = parse(contenido)
+
+                # Se registra hasta que el XML se parseó bien; si falla, la
+                # siguiente corrida lo vuelve a intentar
+                if uuid is not None:
+                    vistos.agregar(uuid)
+
+                if _incluir(factura, tipos):
+                    yield factura.compactar() if compacto else factura
+
+
 
-    return sorted([f for f in facturas if f.fecha], key=lambda x : x.fecha)
+def _indice_directorio(directorio: Path, indice):
+    from .indice_archivos import IndiceArchivos
 
+    if indice is None:
+        return IndiceArchivos(directorio / ".cfdi_indice.sqlite")
+    if not isinstance(indice, IndiceArchivos):
+        return IndiceArchivos(indice)
+    return indice
 
-def exportar_facturas_excel(facturas: list[FacturaFiscal]) -> str:
+
+def convertir_facturas_directorio(
+    directorio: Union[str, Path] = None,
+    indice=None,
+    errores: list = None,
+    tipos: tuple = TIPOS_RELACION,
+):
+    # Igual que convertir_facturas_zip pero sobre los XML sueltos de un
+    # directorio (incluye subdirectorios). indice: IndiceArchivos o ruta del
+    # archivo de índice; por defecto .cfdi_indice.sqlite dentro del
+    # directorio. Sólo se parsean los archivos nuevos o modificados desde la
+    # última vez; el resto se lee del índice.
+
+    if directorio is None:
+        return "Debe de enviar la ruta del directorio."
+
+    directorio = Path(directorio)
+    if not directorio.is_dir():
+        return "El directorio en la ruta {} no existe".format(directorio)
+
+    _indice = _indice_directorio(directorio, indice)
+
+    try:
+        _indice.sincronizar(directorio, errores)
+        facturas = [f for f in _indice.facturas() if _incluir(f, tipos) and f.fecha]
+    finally:
+        if _indice is not indice:
+            _indice.cerrar()
+
+    facturas.sort(key=lambda x : x.fecha)
+
+    return facturas
+
+
+def vigilar_directorio(
+    directorio: Union[str, Path],
+    facturas: list = None,
+    indice=None,
+    intervalo: float = 5.0,
+    ciclos: int = None,
+    errores: list = None,
+    tipos: tuple = TIPOS_RELACION,
+):
+    # Generador que revisa el directorio cada intervalo segundos y entrega
+    # la lista de facturas nuevas o modificadas de cada revisión. Si se envía
+    # facturas (p. ej. el resultado de convertir_facturas_directorio con el
+    # mismo índice), también se actualiza: la factura de un archivo
+    # modificado reemplaza a la anterior (se busca por el UUID que tenía en
+    # el índice) y las de archivos eliminados o que ya no se pueden parsear
+    # se quitan. ciclos limita el número de revisiones; None revisa hasta
+    # que se deje de consumir el generador.
+    import time
+    from collections import Counter
+
+    directorio = Path(directorio)
+    _indice = _indice_directorio(directorio, indice)
+
+    try:
+        ciclo = 0
+        while ciclos is None or ciclo < ciclos:
+            if ciclo > 0:
+                time.sleep(intervalo)
+            ciclo += 1
+
+            cambios: dict = {}
+            nuevas = [
+                f
+                for f in _indice.sincronizar(directorio, errores, cambios)
+                if _incluir(f, tipos)
+            ]
+            if facturas is not None:
+                # Una entrada por archivo: si dos archivos traen el mismo
+                # UUID sólo se quita una de sus facturas
+                quitar = Counter(uuid for uuid, _ in cambios.values() if uuid)
+                if quitar:
+                    conservar = []
+                    for f in facturas:
+                        if quitar[f.uuid] > 0:
+                            quitar[f.uuid] -= 1
+                        else:
+                            conservar.append(f)
+                    facturas[:] = conservar
+                facturas.extend(nuevas)
+            yield nuevas
+    finally:
+        if _indice is not indice:
+            _indice.cerrar()
+
+HEADERS_RELACION = [
+    "Periodo",
+    "Periodo Declarado",
+    "Fecha",
+    "Uuid",
+    "RFC Emisor",
+    "Emisor",
+    "RFC Receptor",
+    "Receptor",
+    "Subtotal",
+    "IVA Trasladado",
+    "ISR Retenido",
+    "Total"
+]
+
+ACCOUNTING_FORMAT = '_(* #,##0.00_);_(* (#,##0.00);_(* "-"??_);_(@_)'
+
+
+def _importes_impuestos(impuestos: list) -> tuple:
+    # IVA trasladado e ISR retenido tal como se llenan las columnas 10 y 11
+    iva = None
+    retenido = None
+    for impuesto in impuestos:
+        if impuesto.tipo == 'traslado':
+            if impuesto.impuesto == 2:
+                iva = impuesto.importe
+        else:
+            retenido = impuesto.importe * -1
+    return iva, retenido
+
+
+def _fila_relacion(i: int, fact: FacturaFiscal, importe: float, impuestos: list) -> list:
+    # Valores de la fila i de las hojas Facturas y MovFact; las fórmulas
+    # apuntan a su propia fila
+    iva, retenido = _importes_impuestos(impuestos)
+    return [
+        "=MONTH(C{})".format(i),
+        "=MONTH(C{})".format(i),
+        fact.fecha,
+        fact.uuid,
+        fact.emisor.rfc,
+        fact.emisor.nombre,
+        fact.receptor.rfc,
+        fact.receptor.nombre,
+        importe,
+        iva,
+        retenido,
+        "=SUM(I{}:K{})".format(i, i),
+    ]
+
+
+def _exportar_facturas_excel_streaming(
+    facturas, salida: Union[str, Path, BinaryIO], metricas=None
+) -> None:
+    # Modo write-only de openpyxl: cada fila se escribe en cuanto se agrega,
+    # así que no se guarda el libro en memoria y basta con una pasada sobre
+    # las facturas (pueden venir de iter_facturas_zip).
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    wb = Workbook(write_only=True)
+    ws1 = wb.create_sheet('Facturas')
+    ws2 = wb.create_sheet('MovFact')
+
+    def importe(ws, valor):
+        cell = WriteOnlyCell(ws, value=valor)
+        cell.number_format = ACCOUNTING_FORMAT
+        return cell
+
+    headers = [header.upper() for header in HEADERS_RELACION]
+    for ws in (ws1, ws2):
+        ws.append(headers[:8] + [importe(ws, header) for header in headers[8:]])
+
+    def fila(ws, i, fact, subtotal, impuestos):
+        valores = _fila_relacion(i, fact, subtotal, impuestos)
+        return valores[:8] + [importe(ws, valor) for valor in valores[8:]]
+
+    from time import perf_counter
+
+    i1 = 1
+    i2 = 1
+    for fact in facturas:
+        # facturas puede ser un generador que parsea al vuelo; sólo se mide
+        # la escritura de las filas
+        if metricas is not None:
+            inicio = perf_counter()
+        i1 += 1
+        ws1.append(fila(ws1, i1, fact, fact.subtotal, fact.impuestos))
+
+        for concepto in fact.conceptos:
+            i2 += 1
+            ws2.append(fila(ws2, i2, fact, concepto.importe, concepto.impuestos))
+        if metricas is not None:
+            metricas.tiempo("excel_escritura", perf_counter() - inicio)
+
+    if metricas is None:
+        wb.save(salida)
+        return
+
+    metricas.contar("filas_escritas", i1 + i2 - 2)
+    with metricas.etapa("excel_guardar"):
+        wb.save(salida)
+
+
+# Filas de datos que caben en una hoja de Excel (1,048,576 menos el encabezado)
+MAX_FILAS_EXCEL = 1048575
+
+
+def _uuids_libro(ruta: Path) -> dict:
+    # Lectura read-only de las hojas Facturas y MovFact: regresa por hoja
+    # (UUIDs de la columna D, número de filas de datos) sin cargar el libro
+    from openpyxl import load_workbook
+
+    hojas = {}
+    wb = load_workbook(ruta, read_only=True)
+    try:
+        for nombre in ('Facturas', 'MovFact'):
+            uuids = set()
+            filas = 0
+            if nombre in wb.sheetnames:
+                for (uuid,) in wb[nombre].iter_rows(
+                    min_row=2, min_col=4, max_col=4, values_only=True
+                ):
+                    filas += 1
+                    if uuid:
+                        uuids.add(uuid)
+            hojas[nombre] = (uuids, filas)
+    finally:
+        wb.close()
+
+    return hojas
+
+
+def _agregar_facturas_excel(
+    facturas: list[FacturaFiscal], salida: Path, max_filas: int, metricas=None
+) -> None:
+    # Modo agregar: sólo se escriben las facturas cuyo UUID no está ya en el
+    # libro. Si las filas no caben en la hoja, las nuevas van a un libro por
+    # periodo (RelacionCFDI_2024-05.xlsx) junto a salida.
+    from openpyxl import load_workbook
+    from time import perf_counter
+
+    hojas = _uuids_libro(salida)
+    uuids_facturas, filas_facturas = hojas['Facturas']
+    uuids_conceptos, filas_conceptos = hojas['MovFact']
+
+    nuevas = [f for f in facturas if f.uuid not in uuids_facturas]
+    conceptos = [
+        (f, c) for f in facturas if f.uuid not in uuids_conceptos for c in f.conceptos
+    ]
+    if not nuevas and not conceptos:
+        return
+
+    if (
+        filas_facturas + len(nuevas) > max_filas
+        or filas_conceptos + len(conceptos) > max_filas
+    ):
+        periodos: dict[str, list] = {}
+        for factura in facturas:
+            if factura.uuid in uuids_facturas and factura.uuid in uuids_conceptos:
+                continue
+            periodo = factura.fecha.strftime("%Y-%m") if factura.fecha else "sin_fecha"
+            periodos.setdefault(periodo, []).append(factura)
+
+        for periodo, facturas_periodo in periodos.items():
+            ruta = salida.with_name("{}_{}{}".format(salida.stem, periodo, salida.suffix))
+            exportar_facturas_excel(
+                facturas_periodo, ruta, metricas=metricas, agregar=True, max_filas=max_filas
+            )
+        return
+
+    if metricas is not None:
+        inicio = perf_counter()
+
+    wb = load_workbook(salida)
+    headers = [header.upper() for header in HEADERS_RELACION]
+
+    def hoja(nombre):
+        if nombre not in wb.sheetnames:
+            wb.create_sheet(nombre).append(headers)
+        return wb[nombre]
+
+    def escribir(ws, filas):
+        # max_row y ws[i] recorren todas las celdas de la hoja; se lee la
+        # última fila una sola vez y los formatos se aplican con ws.cell
+        i = ws.max_row
+        for fact, importe, impuestos in filas:
+            i += 1
+            ws.append(_fila_relacion(i, fact, importe, impuestos))
+            for columna in range(9, 13):
+                ws.cell(row=i, column=columna).number_format = ACCOUNTING_FORMAT
+
+    escribir(hoja('Facturas'), ((f, f.subtotal, f.impuestos) for f in nuevas))
+    escribir(
+        hoja('MovFact'), ((f, c.importe, c.impuestos) for f, c in conceptos)
+    )
+
+    if metricas is None:
+        wb.save(salida)
+        return
+
+    metricas.tiempo("excel_escritura", perf_counter() - inicio)
+    metricas.contar("filas_escritas", len(nuevas) + len(conceptos))
+    with metricas.etapa("excel_guardar"):
+        wb.save(salida)
+
+
+def exportar_facturas_excel(
+    facturas: list[FacturaFiscal],
+    salida: Union[str, Path, BinaryIO] = 'RelacionCFDI.xlsx',
+    streaming: bool = False,
+    metricas=None,
+    agregar: bool = False,
+    max_filas: int = MAX_FILAS_EXCEL,
+) -> str:
+    # salida: ruta o stream binario donde se guarda el libro.
+    # streaming: usa el modo write-only de openpyxl; facturas puede ser
+    # cualquier iterable y se recorre una sola vez.
+    # metricas: cfdi.metricas.Metricas para medir escritura de celdas
+    # (excel_escritura, filas_escritas) y guardado (excel_guardar).
+    # agregar: si el libro en salida ya existe, sólo agrega las facturas
+    # cuyo UUID no está en sus hojas; si ya no caben max_filas filas se
+    # escriben libros por periodo (ver _agregar_facturas_excel).
+
+    if agregar:
+        if not isinstance(salida, (str, Path)):
+            return "Para agregar al libro debe de enviar la ruta del archivo."
+        salida = Path(salida)
+        if salida.exists():
+            _agregar_facturas_excel(list(facturas), salida, max_filas, metricas)
+            return None
+
+    if streaming:
+        _exportar_facturas_excel_streaming(facturas, salida, metricas)
+        return None
+
+    from time import perf_counter
+
+    if metricas is not None:
+        inicio = perf_counter()
 
     from openpyxl import Workbook
     from datetime import datetime
+    from dataclasses import fields
 
     class EVConcepto(Concepto):
         emisor: Emisor
@@ -46,7 +743,7 @@ def exportar_facturas_excel(facturas: list[FacturaFiscal]) -> str:
     list_conceptos: list[EVConcepto] = []
     for factura in facturas:
         for concepto in factura.conceptos:
-            c = EVConcepto(**concepto.__dict__)
+            c = EVConcepto(**{f.name: getattr(concepto, f.name) for f in fields(concepto)})
             c.fecha = factura.fecha
             c.uuid = factura.uuid
             c.emisor = factura.emisor
@@ -62,20 +759,7 @@ def exportar_facturas_excel(facturas: list[FacturaFiscal]) -> str:
     ws1 = wb.worksheets[0]
     ws1.title = 'Facturas'
 
-    headers = [
-        "Periodo",
-        "Periodo Declarado",
-        "Fecha",
-        "Uuid",
-        "RFC Emisor",
-        "Emisor",
-        "RFC Receptor",
-        "Receptor",
-        "Subtotal",
-        "IVA Trasladado",
-        "ISR Retenido",
-        "Total"
-    ]
+    headers = HEADERS_RELACION
 
     for i, header in enumerate(headers):
         ws1.cell(1, i + 1, header.upper())
@@ -141,7 +825,13 @@ def exportar_facturas_excel(facturas: list[FacturaFiscal]) -> str:
         for cell in row:
             cell.number_format = accounting_format
 
+    if metricas is None:
+        wb.save(salida)
+        return None
 
-    wb.save('RelacionCFDI.xlsx')
+    metricas.tiempo("excel_escritura", perf_counter() - inicio)
+    metricas.contar("filas_escritas", len(facturas) + len(list_conceptos))
+    with metricas.etapa("excel_guardar"):
+        wb.save(salida)
 
     return None
@@ -0,0 +1,154 @@
+from typing import Sequence
+
+import numpy as np
+
+from .cfdi import FacturaFiscal
+
+# Reglas que regresa validar_lote
+REGLA_SUBTOTAL = "subtotal"  # SubTotal != suma de importes de los conceptos
+REGLA_TOTAL = "total"  # Total != SubTotal - Descuento + traslados - retenciones
+# Importe de un impuesto de concepto fuera de los límites de redondeo de
+# Base * TasaOCuota, o impuesto del comprobante distinto de la suma de los
+# conceptos con el mismo impuesto (y tasa, en traslados)
+REGLA_IMPUESTO = "impuesto"
+
+# Diferencia máxima aceptada por redondeo, en unidades de la moneda
+TOLERANCIA = 0.01
+
+# Decimales de los importes para los límites de redondeo del Anexo 20
+DECIMALES = 2
+
+
+def validar_lote(
+    facturas: Sequence[FacturaFiscal], tolerancia: float = TOLERANCIA
+) -> list[list[str]]:
+    """Revisa la consistencia aritmética de un lote de facturas.
+
+    Regresa, en el mismo orden, la lista de reglas que no cumple cada
+    factura (vacía si es correcta).
+    """
+    n = len(facturas)
+
+    subtotal = np.empty(n, dtype=np.float64)
+    total = np.empty(n, dtype=np.float64)
+    descuento = np.empty(n, dtype=np.float64)
+
+    # Se aplanan conceptos e impuestos con el índice de su factura
+    concepto_factura = []
+    concepto_importe = []
+    impuesto_factura = []
+    impuesto_documento = []
+    impuesto_traslado = []
+    impuesto_codigo = []
+    impuesto_base = []
+    impuesto_tasa = []
+    impuesto_importe = []
+
+    def agregar_impuestos(i: int, impuestos: list, documento: bool):
+        for impuesto in impuestos:
+            impuesto_factura.append(i)
+            impuesto_documento.append(documento)
+            impuesto_traslado.append(impuesto.tipo == "traslado")
+            impuesto_codigo.append(int(impuesto.impuesto or 0))
+            impuesto_base.append(impuesto.base)
+            impuesto_tasa.append(impuesto.tasa_o_cuota)
+            impuesto_importe.append(impuesto.importe)
+
+    for i, factura in enumerate(facturas):
+        subtotal[i] = factura.subtotal
+        total[i] = factura.total
+        descuento[i] = factura.descuento or 0.0
+        agregar_impuestos(i, factura.impuestos, True)
+        for concepto in factura.conceptos:
+            concepto_factura.append(i)
+            concepto_importe.append(concepto.importe)
+            agregar_impuestos(i, concepto.impuestos, False)
+
+    concepto_factura = np.array(concepto_factura, dtype=np.int64)
+    impuesto_factura = np.array(impuesto_factura, dtype=np.int64)
+    impuesto_documento = np.array(impuesto_documento, dtype=bool)
+    impuesto_traslado = np.array(impuesto_traslado, dtype=bool)
+    impuesto_codigo = np.array(impuesto_codigo, dtype=np.int64)
+    impuesto_base = np.array(impuesto_base, dtype=np.float64)
+    impuesto_tasa = np.array(impuesto_tasa, dtype=np.float64)
+    impuesto_importe = np.array(impuesto_importe, dtype=np.float64)
+
+    # SubTotal contra la suma de importes de los conceptos
+    suma_conceptos = np.bincount(
+        concepto_factura, weights=np.array(concepto_importe), minlength=n
+    )
+    falla_subtotal = np.abs(subtotal - suma_conceptos) > tolerancia
+
+    # Total contra SubTotal - Descuento + traslados - retenciones del comprobante
+    signo = np.where(impuesto_traslado, 1.0, -1.0)
+    neto_impuestos = np.bincount(
+        impuesto_factura[impuesto_documento],
+        weights=(impuesto_importe * signo)[impuesto_documento],
+        minlength=n,
+    )
+    falla_total = (
+        np.abs(total - (subtotal - descuento + neto_impuestos)) > tolerancia
+    )
+
+    falla_impuesto = np.zeros(n, dtype=bool)
+    concepto_impuesto = ~impuesto_documento
+
+    # Impuestos de concepto: el Importe debe quedar entre los límites del
+    # Anexo 20, (Base - 10^-d / 2) * Tasa truncado y
+    # (Base + 10^-d / 2 - 10^-12) * Tasa redondeado hacia arriba, con d
+    # decimales. Sólo aplica cuando hay base y tasa.
+    escala = 10.0 ** DECIMALES
+    media = 0.5 / escala
+    # Margen para el error de punto flotante al truncar o redondear
+    margen = 1e-9
+    inferior = np.floor((impuesto_base - media) * impuesto_tasa * escala + margen) / escala
+    superior = np.ceil((impuesto_base + media - 1e-12) * impuesto_tasa * escala - margen) / escala
+    aplica = concepto_impuesto & (impuesto_base > 0) & (impuesto_tasa > 0)
+    fuera = (impuesto_importe < inferior - margen) | (impuesto_importe > superior + margen)
+    falla_impuesto[impuesto_factura[aplica & fuera]] = True
+
+    # Impuestos del comprobante: cada traslado debe ser la suma de los
+    # traslados de sus conceptos con el mismo impuesto y tasa; cada
+    # retención, la suma de las retenciones con el mismo impuesto
+    if len(impuesto_factura):
+        tasa_grupo = np.where(impuesto_traslado, np.round(impuesto_tasa * 1e6), 0)
+        llaves = np.column_stack(
+            (impuesto_factura, impuesto_traslado, impuesto_codigo, tasa_grupo)
+        ).astype(np.int64)
+        _, grupo = np.unique(llaves, axis=0, return_inverse=True)
+        grupo = grupo.ravel()
+        grupos = int(grupo.max()) + 1
+
+        suma_conceptos_impuesto = np.bincount(
+            grupo[concepto_impuesto],
+            weights=impuesto_importe[concepto_impuesto],
+            minlength=grupos,
+        )
+        suma_documento = np.bincount(
+            grupo[impuesto_documento],
+            weights=impuesto_importe[impuesto_documento],
+            minlength=grupos,
+        )
+
+        # Las facturas sin impuestos en los conceptos no se pueden comparar
+        con_conceptos = np.zeros(n, dtype=bool)
+        con_conceptos[impuesto_factura[concepto_impuesto]] = True
+
+        diferencia = np.abs(suma_documento - suma_conceptos_impuesto) > tolerancia
+        revisar = impuesto_documento & con_conceptos[impuesto_factura]
+        falla_impuesto[impuesto_factura[revisar & diferencia[grupo]]] = True
+
+    reglas = []
+    for s, t, imp in zip(
+        falla_subtotal.tolist(), falla_total.tolist(), falla_impuesto.tolist()
+    ):
+        violadas = []
+        if s:
+            violadas.append(REGLA_SUBTOTAL)
+        if t:
+            violadas.append(REGLA_TOTAL)
+        if imp:
+            violadas.append(REGLA_IMPUESTO)
+        reglas.append(violadas)
+
+    return reglas
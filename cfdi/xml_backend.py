@@ -0,0 +1,12 @@
+# La capa de parseo vive en sat_xml.backend para que comprobante_fiscal_sat
+# la use sin depender de cfdi; aquí se reexporta con su nombre de siempre.
+from sat_xml.backend import (
+    NAMESPACES,
+    usar_backend,
+    backend,
+    fromstring,
+    atributo_raiz,
+    parse,
+    xpath,
+    buscar,
+)
@@ -1,32 +1,80 @@
 from .comprobante_ingresos import ComprobanteIngreso
 from .comprobante_pago import ComprobantePago
+from .serializar import serializar_json
+from io import BytesIO
 from typing import  Union
 
 class ComprobanteFiscal:
     
     @staticmethod
-    def convertirxml(xml: str = None,) -> Union[ComprobanteIngreso, ComprobantePago]:
+    def convertirxml(xml: str = None, cache=None) -> Union[ComprobanteIngreso, ComprobantePago]:
+        # cache: CacheFacturas (cfdi.cache) para no volver a convertir un
+        # XML ya visto; la llave es el SHA-256 del contenido. Se guardan en el
+        # espacio "comprobantes" para no mezclarlos con las FacturaFiscal.
         
         if xml is None:
             return None
-        
-        import xml.etree.ElementTree as ET
-        
+
         if xml.endswith(".xml"):
-            root = ET.parse(xml)
-            root = root.getroot()
+            # El archivo se lee una sola vez
+            with open(xml, "rb") as f:
+                contenido = f.read()
         else:
-            root = ET.fromstring(xml)
-        
-        if root is None:
+            contenido = xml
+
+        if cache is not None:
+            return cache.obtener_o_parsear(
+                contenido, ComprobanteFiscal._convertir, espacio="comprobantes"
+            )
+
+        return ComprobanteFiscal._convertir(contenido)
+
+    @staticmethod
+    def convertir_lote(
+        sources=None,
+        workers: int = None,
+        chunksize: int = 100,
+        ordenado: bool = True,
+        errores: list = None,
+    ):
+        # sources: lista de rutas .xml, contenidos (str o bytes) o ambos, o
+        # la ruta/BytesIO de un ZIP. workers: procesos del pool; None
+        # convierte en el proceso actual. chunksize: fuentes por lote enviado
+        # a cada proceso. ordenado: True regresa la lista de comprobantes en
+        # el orden de las fuentes; False un generador de (índice,
+        # comprobante) conforme terminan. errores: lista donde se agregan
+        # (fuente, mensaje) de las que no se pudieron convertir; su
+        # comprobante es None.
+        from pathlib import Path
+        from .lote import convertir_lote, _es_zip
+
+        if sources is None:
             return None
-        
-        tipo = root.attrib.get('TipoDeComprobante', None)
-        
-        if tipo is None:
+
+        if _es_zip(sources) and not isinstance(sources, BytesIO):
+            if not Path(sources).exists():
+                return "El archivo en la ruta {} no existe".format(sources)
+
+        return convertir_lote(sources, workers, chunksize, ordenado, errores)
+
+    @staticmethod
+    def _convertir(contenido: Union[str, bytes]) -> Union[ComprobanteIngreso, ComprobantePago]:
+        from sat_xml import backend as xml_backend
+
+        # El tipo se lee de la etiqueta de apertura; si no es un tipo
+        # soportado no se parsea el documento completo
+        tipo = xml_backend.atributo_raiz(contenido, "TipoDeComprobante")
+        if tipo is not None and tipo not in ("I", "P"):
             return None
 
-        elif tipo == "I":
-            return ComprobanteIngreso.convertir_xml(xml=xml)
+        root = xml_backend.fromstring(contenido)
+
+        if root is None:
+            return None
+
+        tipo = root.get('TipoDeComprobante', None)
+
+        if tipo == "I":
+            return ComprobanteIngreso.convertir_xml(root=root)
         elif tipo == "P":
-            return ComprobantePago.convertir_xml(xml=xml)
\ No newline at end of file
+            return ComprobantePago.convertir_xml(root=root)
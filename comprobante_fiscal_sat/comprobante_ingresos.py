@@ -1,4 +1,6 @@
 import xml.etree.ElementTree as ET
+from sat_xml import backend as xml_backend
+from sat_xml.etiquetas import TAG_IMPUESTOS, TAG_TRASLADO, TAG_RETENCION
 from .models import (
     List,
     Emisor,
@@ -19,7 +21,7 @@ class ComprobanteTools:
         _impuestos = []
 
         if tag is not None:
-            for _impuesto in tag.iterfind(".//cfdi:" + tipo, namespaces):
+            for _impuesto in xml_backend.xpath(".//cfdi:" + tipo)(tag):
                 _impuesto_class = Impuesto()
                 _impuesto_class.tipo = tipo
                 _impuesto_class.set_from_dict(_impuesto.attrib)
@@ -27,6 +29,25 @@ class ComprobanteTools:
 
         return _impuestos
 
+    @staticmethod
+    def impuestos_nodo(tag: ET.ElementTree) -> List[Impuesto]:
+        # Traslados y retenciones de un nodo cfdi:Impuestos (del comprobante
+        # o de un concepto); primero los traslados, igual que
+        # obtener_impuestos por tipo. Sólo se recorre el subárbol del nodo.
+        # iter con la etiqueta ya calificada es más rápido que xml_backend.xpath
+        # con ambos backends (se llama una vez por concepto).
+        _impuestos = []
+
+        if tag is not None:
+            for tag_impuesto, tipo in ((TAG_TRASLADO, "Traslado"), (TAG_RETENCION, "Retencion")):
+                for elemento in tag.iter(tag_impuesto):
+                    _impuesto_class = Impuesto()
+                    _impuesto_class.tipo = tipo
+                    _impuesto_class.set_from_dict(elemento.attrib)
+                    _impuestos.append(_impuesto_class)
+
+        return _impuestos
+
 
 class ComprobanteIngreso:
     comprobante: Comprobante
@@ -35,17 +56,29 @@ class ComprobanteIngreso:
     conceptos: List[Concepto]
     timbrefiscal: TimbreFiscal
 
+    def asdict(self):
+        return {
+            "comprobante": self.comprobante.asdict() if self.comprobante else None,
+            "emisor": self.emisor.asdict() if self.emisor else None,
+            "receptor": self.receptor.asdict() if self.receptor else None,
+            "conceptos": [c.asdict() for c in self.conceptos] if hasattr(self, "conceptos") and self.conceptos else [],
+            "timbrefiscal": self.timbrefiscal.asdict() if self.timbrefiscal else None,
+        }
+
     @staticmethod
-    def convertir_xml(xml: str) -> "ComprobanteIngreso":
+    def convertir_xml(xml: str = None, root=None) -> "ComprobanteIngreso":
+        # xml: texto o ruta del XML. root: elemento raíz ya parseado (p. ej.
+        # desde ComprobanteFiscal.convertirxml); si se envía no se vuelve a
+        # parsear el XML.
 
-        if not isinstance(xml, str):
-            return None
+        if root is None:
+            if not isinstance(xml, str):
+                return None
 
-        if xml.endswith(".xml"):
-            root = ET.parse(xml)
-            root = root.getroot()
-        else:
-            root = ET.fromstring(text=xml)
+            if xml.endswith(".xml"):
+                root = xml_backend.parse(xml)
+            else:
+                root = xml_backend.fromstring(xml)
 
         if root is None:
             return None
@@ -53,55 +86,37 @@ class ComprobanteIngreso:
         comprobante = Comprobante()
         comprobante.set_from_dict(root.attrib)
 
-        namespaces = {
-            "cfdi": "http://www.sat.gob.mx/cfd/4",
-            "tfd": "http://www.sat.gob.mx/TimbreFiscalDigital",
-        }
-
-        tipo_impuesto = ["Traslado", "Retencion"]
+        # Impuestos del comprobante: hijo directo de la raíz (".//" encontraba
+        # primero los del primer concepto)
+        comprobante_impuestos = ComprobanteTools.impuestos_nodo(root.find(TAG_IMPUESTOS))
 
-        comprobante_impuestos = []
-        comprobante_impuestos_tag = root.find(".//cfdi:Impuestos", namespaces)
-
-        if comprobante_impuestos_tag is not None:
-            for tipo in tipo_impuesto:
-                comprobante_impuestos.extend(
-                    ComprobanteTools.obtener_impuestos(
-                        tag=comprobante_impuestos_tag, tipo=tipo, namespaces=namespaces
-                    )
-                )
-
-        emisor_tag = root.find(".//cfdi:Emisor", namespaces)
+        emisor_tag = xml_backend.buscar(root, "cfdi:Emisor")
 
         if emisor_tag is not None:
             emisor = Emisor()
             emisor.set_from_dict(emisor_tag.attrib)
 
-        receptor_tag = root.find(".//cfdi:Receptor", namespaces)
+        receptor_tag = xml_backend.buscar(root, "cfdi:Receptor")
 
         if receptor_tag is not None:
             receptor = Receptor()
             receptor.set_from_dict(receptor_tag.attrib)
 
-        timbrefiscal_tag = root.find(".//tfd:TimbreFiscalDigital", namespaces)
+        timbrefiscal_tag = xml_backend.buscar(root, "cfdi:Complemento/tfd:TimbreFiscalDigital")
 
         if timbrefiscal_tag is not None:
             timbrefiscal = TimbreFiscal()
             timbrefiscal.set_from_dict(timbrefiscal_tag.attrib)
 
         conceptos = []
-        for _concepto_tag in root.findall(".//cfdi:Concepto", namespaces):
+        for _concepto_tag in xml_backend.xpath(".//cfdi:Concepto")(root):
             if _concepto_tag is not None:
                 _concepto = Concepto()
                 _concepto.set_from_dict(_concepto_tag.attrib)
-                for tipo in tipo_impuesto:
-                    _concepto.Impuestos.extend(
-                        ComprobanteTools.obtener_impuestos(
-                            tag=comprobante_impuestos_tag,
-                            tipo=tipo,
-                            namespaces=namespaces,
-                        )
-                    )
+                # Cada concepto sólo lleva los impuestos de su propio nodo
+                _concepto.Impuestos = ComprobanteTools.impuestos_nodo(
+                    _concepto_tag.find(TAG_IMPUESTOS)
+                )
 
                 conceptos.append(_concepto)
 
@@ -115,4 +130,4 @@ class ComprobanteIngreso:
         comprobante_ingreso.timbrefiscal = timbrefiscal
         comprobante_ingreso.conceptos = conceptos
 
-        return comprobante
+        return comprobante_ingreso
@@ -1,4 +1,4 @@
-import xml.etree.ElementTree as ET
+from sat_xml import backend as xml_backend
 from typing import List
 from .models import (
     Pago,
@@ -31,42 +31,39 @@ class ComprobantePago:
         }
 
     @staticmethod
-    def convertir_xml(xml: str) -> "ComprobantePago":
+    def convertir_xml(xml: str = None, root=None) -> "ComprobantePago":
+        # xml: texto o ruta del XML. root: elemento raíz ya parseado (p. ej.
+        # desde ComprobanteFiscal.convertirxml); si se envía no se vuelve a
+        # parsear el XML.
 
-        if not isinstance(xml, str):
-            return None
+        if root is None:
+            if not isinstance(xml, str):
+                return None
 
-        if xml.endswith(".xml"):
-            root = ET.parse(xml)
-            root = root.getroot()
-        else:
-            root = ET.fromstring(text=xml)
+            if xml.endswith(".xml"):
+                root = xml_backend.parse(xml)
+            else:
+                root = xml_backend.fromstring(xml)
 
         if root is None:
             return None
         
-        namespaces = {
-            "cfdi": "http://www.sat.gob.mx/cfd/4",
-            "pago20": "http://www.sat.gob.mx/Pagos20",
-            "tfd": "http://www.sat.gob.mx/TimbreFiscalDigital"
-        }
-
         _comprobante = Comprobante()
         _comprobante.set_from_dict(root.attrib)
 
-        emisor_tag = root.find(".//cfdi:Emisor", namespaces)
+        emisor_tag = xml_backend.buscar(root, "cfdi:Emisor")
 
         if emisor_tag is not None:
             emisor = Emisor()
             emisor.set_from_dict(emisor_tag.attrib)
 
-        receptor_tag = root.find(".//cfdi:Receptor", namespaces)
+        receptor_tag = xml_backend.buscar(root, "cfdi:Receptor")
 
         if receptor_tag is not None:
             receptor = Receptor()
             receptor.set_from_dict(receptor_tag.attrib)
 
-        timbrefiscal_tag = root.find(".//tfd:TimbreFiscalDigital", namespaces)
+        timbrefiscal_tag = xml_backend.buscar(root, "cfdi:Complemento/tfd:TimbreFiscalDigital")
 
         if timbrefiscal_tag is not None:
             timbrefiscal = TimbreFiscal()
@@ -75,35 +72,33 @@ class ComprobantePago:
 
         pagos = None
 
-        pagos_tag = root.find(".//pago20:Pagos", namespaces)
+        pagos_tag = xml_backend.buscar(root, "cfdi:Complemento/pago20:Pagos")
 
         if pagos_tag is not None:
             pagos = Pagos()
             pagos.set_from_dict(pagos_tag.attrib)
 
 
-            pagostotales_tag = pagos_tag.find(".//pago20:Totales", namespaces)
+            pagostotales_tag = xml_backend.buscar(pagos_tag, "pago20:Totales")
             if pagostotales_tag is not None:
                 pagos_totales = PagoTotales()
                 pagos_totales.set_from_dict(pagostotales_tag.attrib)
                 pagos.Totales = pagos_totales
             
-            pago_tag = pagos_tag.find(".//pago20:pago", namespaces)
+            pago_tag = xml_backend.buscar(pagos_tag, "pago20:Pago")
             
             if pago_tag is not None:
                 pago = Pago()
                 pago.set_from_dict(pago_tag.attrib)
 
-                documentos_rel_tag = pago_tag.findall(".//pago20:DoctoRelacionado", namespaces)
+                documentos_rel_tag = xml_backend.xpath(".//pago20:DoctoRelacionado")(pago_tag)
 
                 if documentos_rel_tag is not None:
                     for dr in documentos_rel_tag:
                         documento_rel = DocumentoRelacionado()
                         documento_rel.set_from_dict(dr.attrib)
                         pago.documentos_relacionados.append(documento_rel)
-                
-                print(pago)
-            
+
                 pagos.pago = pago
 
 
@@ -0,0 +1,138 @@
+import os
+from io import BytesIO
+from pathlib import Path
+from typing import Iterable, Iterator, Union
+
+# Conversión de muchos CFDI con ComprobanteFiscal. Las fuentes se dividen en
+# lotes de chunksize y cada lote se convierte en un proceso del pool. El
+# comprobante de una fuente es None si no es un ingreso/pago o si no se pudo
+# convertir; en ese caso el error queda en errores como (fuente, mensaje).
+
+
+def _es_ruta(fuente) -> bool:
+    return isinstance(fuente, os.PathLike) or (
+        isinstance(fuente, str) and fuente.endswith(".xml")
+    )
+
+
+def _es_zip(sources) -> bool:
+    if isinstance(sources, BytesIO):
+        return True
+    if not isinstance(sources, (str, os.PathLike)):
+        return False
+    return os.fspath(sources).lower().endswith(".zip")
+
+
+def _nombre(indice: int, fuente, zip_ruta: str) -> str:
+    # Rutas y miembros del ZIP se reportan por nombre; el contenido por índice
+    if zip_ruta is not None or _es_ruta(fuente):
+        return str(fuente)
+    return "#{}".format(indice)
+
+
+def _convertir_lote(fuentes: list, zip_ruta: str = None) -> tuple:
+    # Se ejecuta en un proceso del pool. fuentes: lista de (índice, fuente);
+    # con zip_ruta las fuentes son nombres de miembros del ZIP. Regresa los
+    # (índice, comprobante) y los (fuente, mensaje) de los que fallaron.
+    from zipfile import ZipFile
+    from . import ComprobanteFiscal
+
+    resultados: list[tuple] = []
+    errores: list[tuple] = []
+
+    zip_file = ZipFile(zip_ruta, "r") if zip_ruta is not None else None
+    try:
+        for indice, fuente in fuentes:
+            try:
+                if zip_file is not None:
+                    contenido = zip_file.read(fuente)
+                elif _es_ruta(fuente):
+                    with open(fuente, "rb") as f:
+                        contenido = f.read()
+                else:
+                    contenido = fuente
+                resultados.append((indice, ComprobanteFiscal._convertir(contenido)))
+            except Exception as e:
+                errores.append((_nombre(indice, fuente, zip_ruta), str(e)))
+                resultados.append((indice, None))
+    finally:
+        if zip_file is not None:
+            zip_file.close()
+
+    return resultados, errores
+
+
+def _fuentes(sources) -> tuple:
+    # Regresa (lista de fuentes, ruta del ZIP o None)
+    from zipfile import ZipFile
+
+    if isinstance(sources, (str, bytes, os.PathLike)) and not _es_zip(sources):
+        # Un solo documento (ruta o contenido)
+        return [sources], None
+
+    if not _es_zip(sources):
+        return list(sources), None
+
+    with ZipFile(sources, "r") as zip_file:
+        nombres = [n for n in zip_file.namelist() if n.lower().endswith(".xml")]
+        if isinstance(sources, BytesIO):
+            # Los procesos no pueden abrir un BytesIO; se envían los bytes
+            return [zip_file.read(n) for n in nombres], None
+    return nombres, os.fspath(sources)
+
+
+def iter_lote(
+    sources: Union[Iterable, str, Path, BytesIO],
+    workers: int = None,
+    chunksize: int = 100,
+    ordenado: bool = True,
+    errores: list = None,
+) -> Iterator[tuple]:
+    # Generador de (índice, comprobante), donde índice es la posición de la
+    # fuente (o del XML dentro del ZIP). Con ordenado=True se entregan en el
+    # orden de las fuentes; con False, conforme termina cada lote.
+    fuentes, zip_ruta = _fuentes(sources)
+    lotes = [
+        list(enumerate(fuentes[i : i + chunksize], start=i))
+        for i in range(0, len(fuentes), chunksize)
+    ]
+
+    if workers is None or workers <= 1:
+        for lote in lotes:
+            resultados, errores_lote = _convertir_lote(lote, zip_ruta)
+            if errores is not None:
+                errores.extend(errores_lote)
+            yield from resultados
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {pool.submit(_convertir_lote, lote, zip_ruta): lote for lote in lotes}
+
+        for futuro in list(futuros) if ordenado else as_completed(futuros):
+            try:
+                resultados, errores_lote = futuro.result()
+            except Exception as e:
+                # Falló el proceso completo; se registra cada fuente del lote
+                lote = futuros[futuro]
+                resultados = [(i, None) for i, _ in lote]
+                errores_lote = [(_nombre(i, f, zip_ruta), str(e)) for i, f in lote]
+            if errores is not None:
+                errores.extend(errores_lote)
+            yield from resultados
+
+
+def convertir_lote(
+    sources: Union[Iterable, str, Path, BytesIO],
+    workers: int = None,
+    chunksize: int = 100,
+    ordenado: bool = True,
+    errores: list = None,
+):
+    # Con ordenado=True regresa la lista de comprobantes en el orden de las
+    # fuentes; con ordenado=False regresa el generador de iter_lote, que
+    # entrega (índice, comprobante) conforme termina cada lote.
+    if not ordenado:
+        return iter_lote(sources, workers, chunksize, False, errores)
+    return [c for _, c in iter_lote(sources, workers, chunksize, True, errores)]
@@ -21,33 +21,93 @@ def default_dict():
     return {}
 
 
+# Marca para dejar el atributo como está: el XML trae un atributo que no es
+# campo de la clase, o un campo dict/list recibe un valor de otro tipo
+_OMITIR = object()
+
+
+def _a_int(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 0
+
+
+def _a_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _solo_dict(value):
+    return value if isinstance(value, dict) else _OMITIR
+
+
+def _solo_list(value):
+    return value if isinstance(value, list) else _OMITIR
+
+
+def _convertidor(default):
+    # Mismo orden que el isinstance original (bool cae en int)
+    if isinstance(default, str):
+        return str
+    if isinstance(default, int):
+        return _a_int
+    if isinstance(default, float):
+        return _a_float
+    if isinstance(default, dict):
+        return _solo_dict
+    if isinstance(default, list):
+        return _solo_list
+    return None
+
+
+# Convertidores por clase: {campo: función}, se arman una vez por clase
+_CONVERTIDORES: Dict[type, Dict] = {}
+
+
+def _convertidores(cls: type) -> Dict:
+    # El convertidor se elige por el tipo del valor por defecto del campo,
+    # igual que set_from_dict lo elegía por el valor actual del atributo.
+    # Las clases que no son dataclass no tienen campos en la instancia, así
+    # que su tabla queda vacía.
+    from dataclasses import MISSING
+
+    convertidores = {}
+    for f in getattr(cls, "__dataclass_fields__", {}).values():
+        if f.default_factory is not MISSING:
+            default = f.default_factory()
+        else:
+            default = f.default
+        convertidores[f.name] = _convertidor(default)
+
+    _CONVERTIDORES[cls] = convertidores
+    return convertidores
+
+
 class Common:
 
     def set_from_dict(self, kwargs: Dict = {}):
-        for key in self.__dict__.keys():
-            if key in kwargs:
-                value = kwargs[key]
-                attr = getattr(self, key)
-                if isinstance(attr, str):
-                    setattr(self, key, str(value))
-                elif isinstance(attr, int):
-                    try:
-                        setattr(self, key, int(value))
-                    except (ValueError, TypeError):
-                        setattr(self, key, 0)
-                elif isinstance(attr, float):
-                    try:
-                        setattr(self, key, float(value))
-                    except (ValueError, TypeError):
-                        setattr(self, key, 0.0)
-                elif isinstance(attr, dict):
-                    if isinstance(value, dict):
-                        setattr(self, key, value)
-                elif isinstance(attr, list):
-                    if isinstance(value, list):
-                        setattr(self, key, value)
-                else:
-                    setattr(self, key, value)
+        # Recorre sólo los atributos del XML (kwargs) y convierte cada uno
+        # con el convertidor precalculado de su campo
+        convertidores = _CONVERTIDORES.get(type(self))
+        if convertidores is None:
+            convertidores = _convertidores(type(self))
+
+        atributos = self.__dict__
+        for key, value in kwargs.items():
+            convertir = convertidores.get(key, _OMITIR)
+            if convertir is _OMITIR:
+                continue
+            if convertir is str:
+                if type(value) is not str:
+                    value = str(value)
+            elif convertir is not None:
+                value = convertir(value)
+                if value is _OMITIR:
+                    continue
+            atributos[key] = value
 
     def asdict(self):
         def convert(value):
@@ -0,0 +1,62 @@
+import json
+import typing
+from typing import Any, Dict
+
+from .models import Common
+
+# JSON directo para ComprobantePago / ComprobanteIngreso y los modelos de
+# models.py, con el mismo contenido que asdict() pero sin armar primero el
+# dict anidado. Con orjson los dataclass se serializan de forma nativa (lee
+# su __dict__, igual que asdict); sin orjson se usa json con un default que
+# entrega el __dict__ de cada objeto.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Atributos de las clases contenedoras (las que no son Common): se toman de
+# sus anotaciones una sola vez. Cada entrada es (nombre, es_lista); los
+# atributos de lista que no existen salen como [] y el resto como None,
+# igual que ComprobantePago.asdict.
+_CAMPOS: Dict[type, tuple] = {}
+
+
+def _campos(cls: type) -> tuple:
+    campos = _CAMPOS.get(cls)
+    if campos is None:
+        campos = _CAMPOS[cls] = tuple(
+            (nombre, typing.get_origin(tipo) is list)
+            for nombre, tipo in typing.get_type_hints(cls).items()
+        )
+    return campos
+
+
+def _default(obj: Any):
+    if isinstance(obj, Common):
+        # Pagos y PagoTotales no son dataclass; su contenido está en __dict__
+        return obj.__dict__
+
+    campos = _campos(type(obj))
+    if not campos:
+        raise TypeError(
+            "Object of type {} is not JSON serializable".format(type(obj).__name__)
+        )
+
+    resultado = {}
+    for nombre, es_lista in campos:
+        valor = getattr(obj, nombre, None)
+        resultado[nombre] = valor if valor else ([] if es_lista else None)
+    return resultado
+
+
+def serializar_json(obj: Any) -> bytes:
+    # obj puede ser un ComprobantePago, ComprobanteIngreso, un modelo o
+    # cualquier dict/list que los contenga (p. ej. la respuesta del API).
+    # Regresa el JSON en bytes (UTF-8).
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(
+        obj, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
@@ -533,7 +533,32 @@ class Database:
 
         return result
 
-    def bulk(self, model: str, records: Union[list[dict], list[tuple]]) -> DBResult:
+    @contextmanager
+    def transaction(self):
+        """
+        Abre una conexión y una transacción; hace commit al salir del bloque
+        o rollback si ocurre una excepción. Regresa un DBConnection que se
+        puede pasar a bulk(connection=...).
+        """
+        sql = self.get_connection()
+        connection = DBConnection(connection=sql, cursor=sql.cursor())
+        try:
+            yield connection
+            sql.commit()
+        except Exception:
+            sql.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def bulk(
+        self,
+        model: str,
+        records: Union[list[dict], list[tuple]],
+        connection: DBConnection = None,
+    ) -> DBResult:
+        # connection: conexión abierta con transaction(); en ese caso no se
+        # hace commit ni se cierra, eso queda a cargo de la transacción
         result = DBResult()
 
         if not records:
@@ -553,12 +578,21 @@ class Database:
         # Creamos el query
         query = f"INSERT IGNORE INTO {self.config.database}.{model} ({','.join(fields)}) VALUES ({','.join(values_key)})"
 
+        sql = None
+        cursor = None
         try:
-            sql = self.get_connection()
-            cursor: mysql.connector.cursor.MySQLCursor = sql.cursor(dictionary=True)
+            if connection is None:
+                sql = self.get_connection()
+                cursor = sql.cursor(dictionary=True)
+            else:
+                cursor = connection.cursor
 
             cursor.executemany(query, values)
-            sql.commit()
+            if sql is not None:
+                sql.commit()
+
+            result.error = False
+            result.message = f"Records inserted on {model}; Total: {len(values)}"
         except (
             mysqlconnector.Error,
             mysqlconnector.DataError,
@@ -567,13 +601,12 @@ class Database:
         ) as e:
             result = handle_error_result(e.msg)
         finally:
-            result.error = False
-            result.message = f"Records inserted on {model}; Total: {len(records)}"
+            if sql is not None:
+                if cursor is not None:
+                    cursor.close()
+                sql.close()
 
-            cursor.close()
-            sql.close()
-
-            return result
+        return result
 
     def get_description_model(self, model: str) -> list[dict]:
         """
@@ -0,0 +1,2 @@
+# Piezas de lectura de XML del SAT compartidas por cfdi y
+# comprobante_fiscal_sat: backend (etree/lxml) y etiquetas (TAG_*).
@@ -0,0 +1,156 @@
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Union, Callable
+
+# Capa de parseo XML: usa xml.etree.ElementTree y, si se pide, lxml. Los
+# elementos de ambos tienen la misma interfaz básica (find, iter, get,
+# attrib), así que el resto del código no depende del backend.
+# etree es el de omisión: en benchmarks/bench_backends.py lxml parsea igual de
+# rápido pero cada acceso a un elemento crea un proxy, y en la conversión de
+# un CFDI (muchos get por nodo) termina siendo más lento.
+# Para elegir uno: variable de entorno CFDI_XML_BACKEND=etree|lxml o
+# usar_backend().
+
+NAMESPACES = {
+    "cfdi": "http://www.sat.gob.mx/cfd/4",
+    "tfd": "http://www.sat.gob.mx/TimbreFiscalDigital",
+    "pago20": "http://www.sat.gob.mx/Pagos20",
+    "nomina12": "http://www.sat.gob.mx/nomina12",
+}
+
+# lxml se importa hasta que se pide (usar_backend("lxml")); importarlo al
+# cargar el módulo le costaba a cada import cfdi aunque se use etree
+_lxml = None
+_backend = None
+_parser_lxml = None
+_parser_lxml_texto = None
+_expresiones: dict = {}
+_rutas: dict = {}
+
+
+def usar_backend(nombre: str = None) -> str:
+    # nombre: "lxml", "etree" o None (CFDI_XML_BACKEND, o etree si no está
+    # definida). Si se pide lxml y no está instalado se usa etree. Regresa el
+    # backend en uso.
+    global _backend, _lxml, _parser_lxml, _parser_lxml_texto
+
+    if nombre is None:
+        nombre = os.environ.get("CFDI_XML_BACKEND", "etree")
+
+    if nombre == "lxml" and _lxml is None:
+        try:
+            from lxml import etree as _lxml
+        except ImportError:
+            pass
+
+    if nombre == "lxml" and _lxml is not None:
+        _backend = "lxml"
+        # Sin resolver entidades externas ni cargar DTD
+        _parser_lxml = _lxml.XMLParser(resolve_entities=False, no_network=True)
+        # Para texto ya decodificado se ignora el encoding de la declaración
+        _parser_lxml_texto = _lxml.XMLParser(
+            resolve_entities=False, no_network=True, encoding="utf-8"
+        )
+    else:
+        _backend = "etree"
+
+    _expresiones.clear()
+    return _backend
+
+
+def backend() -> str:
+    return _backend
+
+
+def fromstring(xml: Union[str, bytes]):
+    # Regresa el elemento raíz del XML en str o bytes
+    if _backend == "lxml":
+        if isinstance(xml, str):
+            # lxml no acepta str con declaración de encoding
+            return _lxml.fromstring(xml.encode("utf-8"), _parser_lxml_texto)
+        return _lxml.fromstring(xml, _parser_lxml)
+
+    return ET.fromstring(xml)
+
+
+# Primera etiqueta de apertura (se salta la declaración <?xml?>, comentarios
+# y DOCTYPE, que empiezan con ? o !)
+_RAIZ = {
+    str: re.compile(r"<[A-Za-z_][^>]*>"),
+    bytes: re.compile(rb"<[A-Za-z_][^>]*>"),
+}
+_atributos_raiz: dict = {}
+
+
+def atributo_raiz(xml: Union[str, bytes], nombre: str) -> Union[str, None]:
+    # Lee un atributo del elemento raíz buscando sólo en su etiqueta de
+    # apertura, sin parsear el documento. None si no se encuentra (o si la
+    # etiqueta no se pudo delimitar); en ese caso hay que parsear el XML.
+    tipo = bytes if isinstance(xml, (bytes, bytearray)) else str
+    raiz = _RAIZ[tipo].search(xml)
+    if raiz is None:
+        return None
+
+    patron = _atributos_raiz.get((tipo, nombre))
+    if patron is None:
+        expresion = r"\s{}\s*=\s*([\"'])(.*?)\1".format(re.escape(nombre))
+        patron = _atributos_raiz[(tipo, nombre)] = re.compile(
+            expresion.encode("ascii") if tipo is bytes else expresion, re.S
+        )
+
+    encontrado = patron.search(raiz.group(0))
+    if encontrado is None:
+        return None
+    valor = encontrado.group(2)
+    return valor.decode("utf-8") if tipo is bytes else valor
+
+
+def parse(ruta: str):
+    # Regresa el elemento raíz del archivo en ruta
+    if _backend == "lxml":
+        return _lxml.parse(ruta, _parser_lxml).getroot()
+
+    return ET.parse(ruta).getroot()
+
+
+def _ruta(expresion: str) -> str:
+    # La expresión con los prefijos ya resueltos ({uri}Tag), para find y
+    # findall sin que tengan que resolverlos en cada llamada
+    ruta = _rutas.get(expresion)
+    if ruta is None:
+        from xml.etree.ElementPath import xpath_tokenizer
+
+        ruta = _rutas[expresion] = "".join(
+            op or tag for op, tag in xpath_tokenizer(expresion, NAMESPACES)
+        )
+    return ruta
+
+
+def xpath(expresion: str) -> Callable:
+    # Compila una vez la expresión (con los prefijos de NAMESPACES) y regresa
+    # una función elemento -> lista de elementos. Con lxml es un XPath
+    # compilado; con etree se usa findall, así que la expresión debe estar
+    # dentro de lo que soporta ElementPath (p. ej. ".//cfdi:Concepto").
+    compilada = _expresiones.get(expresion)
+    if compilada is not None:
+        return compilada
+
+    if _backend == "lxml":
+        compilada = _lxml.XPath(expresion, namespaces=NAMESPACES)
+    else:
+        ruta = _ruta(expresion)
+        compilada = lambda elemento: elemento.findall(ruta)
+
+    _expresiones[expresion] = compilada
+    return compilada
+
+
+def buscar(elemento, expresion: str):
+    # Primer elemento que cumple la expresión o None. Se usa find (también
+    # en lxml), que se detiene en el primero en lugar de recorrer todo el
+    # documento; la expresión debe estar dentro de lo que soporta ElementPath.
+    return elemento.find(_ruta(expresion))
+
+
+usar_backend()
@@ -0,0 +1,27 @@
+# Namespaces y nombres de tag ya calificados ({uri}Tag) del CFDI 4.0 y sus
+# complementos, para buscar y comparar sin resolver prefijos en cada
+# documento. Los comparten cfdi y comprobante_fiscal_sat.
+
+NS_CFDI = "{http://www.sat.gob.mx/cfd/4}"
+NS_TFD = "{http://www.sat.gob.mx/TimbreFiscalDigital}"
+NS_PAGO = "{http://www.sat.gob.mx/Pagos20}"
+NS_NOMINA = "{http://www.sat.gob.mx/nomina12}"
+
+TAG_COMPROBANTE = NS_CFDI + "Comprobante"
+TAG_EMISOR = NS_CFDI + "Emisor"
+TAG_RECEPTOR = NS_CFDI + "Receptor"
+TAG_CONCEPTOS = NS_CFDI + "Conceptos"
+TAG_CONCEPTO = NS_CFDI + "Concepto"
+TAG_IMPUESTOS = NS_CFDI + "Impuestos"
+TAG_TRASLADO = NS_CFDI + "Traslado"
+TAG_RETENCION = NS_CFDI + "Retencion"
+TAG_COMPLEMENTO = NS_CFDI + "Complemento"
+TAG_TIMBRE = NS_TFD + "TimbreFiscalDigital"
+TAG_PAGOS = NS_PAGO + "Pagos"
+TAG_PAGO = NS_PAGO + "Pago"
+TAG_DOCTO_RELACIONADO = NS_PAGO + "DoctoRelacionado"
+TAG_NOMINA = NS_NOMINA + "Nomina"
+
+RUTA_TIMBRE = TAG_COMPLEMENTO + "/" + TAG_TIMBRE
+RUTA_PAGOS = TAG_COMPLEMENTO + "/" + TAG_PAGOS
+RUTA_NOMINA = TAG_COMPLEMENTO + "/" + TAG_NOMINA
@@ -1,6 +1,6 @@
-from flask import Flask, render_template, request
+from flask import Flask, Response, render_template, request
 from werkzeug.datastructures import FileStorage
-from comprobante_fiscal_sat import ComprobanteFiscal
+from comprobante_fiscal_sat import ComprobanteFiscal, serializar_json
 
 
 app = Flask(__name__)
@@ -23,10 +23,11 @@ def action_xml():
             "message": "No es una XML valido"
         }
 
-    return {
-        "error": False,
-        "message": comprobante.asdict()
-    }
+    # Se serializa directo a bytes, sin pasar por asdict ni el encoder de Flask
+    return Response(
+        serializar_json({"error": False, "message": comprobante}),
+        mimetype="application/json",
+    )
 
 app.run(
     host="0.0.0.0",
@@ -16,6 +16,9 @@ path = Path(sys.argv[1])
 if not path.exists():
     raise ValueError('No es una ruta valida {}'.format(str(path)))
 
-facturas = tools.convertir_facturas_zip(path)
+if path.is_dir():
+    facturas = tools.convertir_facturas_directorio(path)
+else:
+    facturas = tools.convertir_facturas_zip(path)
 
 tools.exportar_facturas_excel(facturas)
\ No newline at end of file